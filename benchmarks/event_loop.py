@@ -0,0 +1,149 @@
+"""Benchmark fetching from a package index with different event loops.
+
+Usage:
+
+    python benchmarks/event_loop.py
+
+A local package index is served from a separate process
+with the payloads recorded by ``benchmarks/json_decoding.py``
+and many small release documents, similar to a refresh.
+Then all documents are fetched concurrently with aiohttp on each event loop
+and the wall time and CPU time of the fetching process are reported.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+PAYLOADS_PATH = Path(__file__).parent / "payloads"
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--releases", type=int, default=5000, help="number of release documents"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="number of concurrent requests"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="number of refreshes")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_index, args=(ready,), daemon=True)
+    server.start()
+    ready.wait()
+    try:
+        urls = index_urls(args.releases)
+        print(f"Fetching {len(urls)} documents {args.rounds} times per loop\n")
+        for loop_name, loop_factory in available_loops().items():
+            wall_times, cpu_times = [], []
+            for _ in range(args.rounds):
+                loop = loop_factory()
+                try:
+                    wall, cpu = loop.run_until_complete(refresh(urls, args.concurrency))
+                finally:
+                    loop.close()
+                wall_times.append(wall)
+                cpu_times.append(cpu)
+
+            print(
+                f"{loop_name:<8} "
+                f"wall: {min(wall_times) * 1000:8.1f} ms  "
+                f"CPU: {min(cpu_times) * 1000:8.1f} ms"
+            )
+    finally:
+        server.terminate()
+
+
+def available_loops() -> Dict[str, Callable[[], asyncio.AbstractEventLoop]]:
+    """Return factories for the installed event loops by name."""
+    loops = {"asyncio": asyncio.new_event_loop}
+    if uvloop:
+        loops["uvloop"] = uvloop.new_event_loop
+    return loops
+
+
+def index_urls(releases: int) -> List[str]:
+    """Return the URLs of all documents of the local index."""
+    base_url = f"http://{HOST}:{PORT}/pypi"
+    urls = [f"{base_url}/{name}/json" for name in load_payloads()]
+    urls += [f"{base_url}/project-{n % 100}/1.{n}.0/json" for n in range(releases)]
+    return urls
+
+
+async def refresh(urls: List[str], concurrency: int):
+    """Fetch and decode all documents and return the wall time and CPU time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def fetch(session: aiohttp.ClientSession, url: str):
+        async with semaphore:
+            async with session.get(url) as resp:
+                return json.loads(await resp.read())
+
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*[fetch(session, url) for url in urls])
+    return time.perf_counter() - started_wall, time.process_time() - started_cpu
+
+
+def serve_index(ready):
+    """Serve a local package index until terminated."""
+    payloads = load_payloads()
+
+    async def project(request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        if name not in payloads:
+            raise web.HTTPNotFound()
+        return web.Response(body=payloads[name], content_type="application/json")
+
+    async def release(request: web.Request) -> web.Response:
+        data = {
+            "info": {
+                "name": request.match_info["name"],
+                "version": request.match_info["version"],
+                "requires_dist": ["dependency>=1.0", "other-dependency<3"],
+                "requires_python": ">=3.8",
+                "yanked": False,
+            }
+        }
+        return web.json_response(data)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/pypi/{name}/json", project)
+        app.router.add_get("/pypi/{name}/{version}/json", release)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, HOST, PORT).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def load_payloads() -> Dict[str, bytes]:
+    """Return the recorded payloads."""
+    return {
+        path.stem: path.read_bytes() for path in sorted(PAYLOADS_PATH.glob("*.json"))
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark decoding of project documents from PyPI with different JSON decoders.
+
+Usage:
+
+    # record payloads of large projects once
+    python benchmarks/json_decoding.py --record boto3 django numpy
+
+    # compare the decoders on the recorded payloads
+    python benchmarks/json_decoding.py
+
+Payloads are stored in the folder ``benchmarks/payloads``.
+When no payloads have been recorded, a synthetic payload resembling
+a large project on PyPI is used instead.
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PAYLOADS_PATH = Path(__file__).parent / "payloads"
+PYPI_URL = "https://pypi.org/pypi/{name}/json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--record", nargs="+", metavar="NAME", help="record payloads for projects"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=20, help="number of decodes per payload"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        record_payloads(args.record)
+        return
+
+    payloads = load_payloads()
+    decoders = available_decoders()
+    print(f"Decoding {len(payloads)} payloads {args.rounds} times each\n")
+    totals = {name: 0.0 for name in decoders}
+    for payload_name, payload in payloads.items():
+        size = len(payload) / 1024 / 1024
+        print(f"{payload_name} ({size:.1f} MB)")
+        for decoder_name, decoder in decoders.items():
+            duration = measure(decoder, payload, args.rounds)
+            totals[decoder_name] += duration
+            print(f"  {decoder_name:<8} {duration * 1000:8.2f} ms")
+
+    print("\nCPU time per refresh, i.e. one decode of each payload:")
+    baseline = totals["json"]
+    for decoder_name, duration in totals.items():
+        saved = (1 - duration / baseline) * 100 if baseline else 0
+        print(f"  {decoder_name:<8} {duration * 1000:8.2f} ms ({saved:.0f} % saved)")
+
+
+def available_decoders() -> Dict[str, Callable[[bytes], Any]]:
+    """Return the installed decoders by name."""
+    decoders = {"json": json.loads}
+    if orjson:
+        decoders["orjson"] = orjson.loads
+    return decoders
+
+
+def measure(decoder: Callable[[bytes], Any], payload: bytes, rounds: int) -> float:
+    """Return the mean CPU time in seconds for decoding a payload."""
+    decoder(payload)  # warm up
+    started = time.process_time()
+    for _ in range(rounds):
+        decoder(payload)
+    return (time.process_time() - started) / rounds
+
+
+def record_payloads(names):
+    """Download project documents from PyPI and store them as payloads."""
+    PAYLOADS_PATH.mkdir(exist_ok=True)
+    for name in names:
+        with urllib.request.urlopen(PYPI_URL.format(name=name)) as resp:
+            payload = resp.read()
+        path = PAYLOADS_PATH / f"{name}.json"
+        path.write_bytes(payload)
+        print(f"Recorded {path} ({len(payload)} bytes)")
+
+
+def load_payloads() -> Dict[str, bytes]:
+    """Return the recorded payloads or a synthetic payload if there are none."""
+    payloads = {
+        path.stem: path.read_bytes() for path in sorted(PAYLOADS_PATH.glob("*.json"))
+    }
+    if not payloads:
+        print("No recorded payloads found. Using a synthetic payload.\n")
+        payloads["synthetic"] = synthetic_payload()
+    return payloads
+
+
+def synthetic_payload(releases: int = 1500, files: int = 10) -> bytes:
+    """Return a project document resembling a large project on PyPI."""
+    data = {
+        "info": {
+            "name": "synthetic",
+            "project_url": "https://pypi.org/project/synthetic/",
+            "description": "Lorem ipsum dolor sit amet. " * 500,
+            "requires_dist": [f"dependency-{n}>=1.0" for n in range(20)],
+        },
+        "releases": {
+            f"1.{n}.0": [
+                {
+                    "filename": f"synthetic-1.{n}.0-cp3{m}-manylinux.whl",
+                    "url": f"https://files.pythonhosted.org/{n}/{m}.whl",
+                    "digests": {"md5": "0" * 32, "sha256": "0" * 64},
+                    "requires_python": ">=3.8",
+                    "size": 123456,
+                    "upload_time_iso_8601": "2024-01-01T00:00:00.000000Z",
+                    "yanked": False,
+                    "yanked_reason": None,
+                }
+                for m in range(files)
+            ]
+            for n in range(releases)
+        },
+        "urls": [],
+        "vulnerabilities": [],
+    }
+    return json.dumps(data).encode("utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark filtering the releases of a project by version specifiers.
+
+Usage:
+
+    python benchmarks/specifier_filtering.py
+
+Compares checking each release against the specifiers one by one
+with filtering the sorted releases by the intervals compiled from the specifiers.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from package_monitor.core.specifier_intervals import (  # noqa: E402
+    compile_specifiers,
+)
+
+SPECIFIERS = [
+    ">=4.2,<5",
+    ">=1.0,!=1.5.2,<2.0",
+    "~=3.1",
+    "==2.*",
+    ">=0.1",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--releases", type=int, default=5000, help="number of releases per project"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=20, help="number of filter runs per case"
+    )
+    args = parser.parse_args()
+
+    versions = sorted(synthetic_versions(args.releases))
+    print(f"Filtering {len(versions)} releases {args.rounds} times per case\n")
+    for specifiers_string in SPECIFIERS:
+        specifiers = SpecifierSet(specifiers_string)
+        compiled = compile_specifiers(specifiers)
+
+        def one_by_one():
+            return [v for v in versions if v in specifiers]
+
+        def intervals():
+            return compiled.filter(versions)
+
+        assert one_by_one() == intervals()
+        duration_1 = measure(one_by_one, args.rounds)
+        duration_2 = measure(intervals, args.rounds)
+        print(
+            f"{specifiers_string:<20} "
+            f"one by one: {duration_1 * 1000:8.2f} ms  "
+            f"intervals: {duration_2 * 1000:8.2f} ms  "
+            f"({duration_1 / duration_2:.0f}x)"
+        )
+
+
+def synthetic_versions(count: int) -> List[Version]:
+    """Return versions resembling the releases of a project with many releases."""
+    versions = []
+    major = minor = patch = 0
+    while len(versions) < count:
+        versions.append(Version(f"{major}.{minor}.{patch}"))
+        if patch % 7 == 3:
+            versions.append(Version(f"{major}.{minor}.{patch + 1}rc1"))
+        patch += 1
+        if patch > 12:
+            patch = 0
+            minor += 1
+        if minor > 9:
+            minor = 0
+            major += 1
+    return versions[:count]
+
+
+def measure(func: Callable, rounds: int) -> float:
+    """Return the mean CPU time in seconds for running a function."""
+    func()  # warm up
+    started = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - started) / rounds
+
+
+if __name__ == "__main__":
+    main()
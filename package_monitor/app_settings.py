@@ -2,6 +2,42 @@
 
 from app_utils.app_settings import clean_setting
 
+PACKAGE_MONITOR_ADAPTIVE_CONCURRENCY_ENABLED = clean_setting(
+    "PACKAGE_MONITOR_ADAPTIVE_CONCURRENCY_ENABLED", True
+)
+"""Whether to adapt the number of concurrent requests to each host
+of a package index during a refresh.
+
+Concurrency grows while a host responds fast and without errors
+and is reduced when it reports errors, rate limits requests or slows down.
+The concurrency limits per host are the upper bounds.
+"""
+
+PACKAGE_MONITOR_CACHE_COMPRESSION_ENABLED = clean_setting(
+    "PACKAGE_MONITOR_CACHE_COMPRESSION_ENABLED", True
+)
+"""Whether to store data from package indexes compressed in the cache.
+
+Data is serialized with msgpack when installed, else with JSON.
+"""
+
+PACKAGE_MONITOR_CIRCUIT_BREAKER_COOLDOWN = clean_setting(
+    "PACKAGE_MONITOR_CIRCUIT_BREAKER_COOLDOWN", 60
+)
+"""Time in seconds to skip requests to an unavailable host of a package index."""
+
+PACKAGE_MONITOR_CIRCUIT_BREAKER_THRESHOLD = clean_setting(
+    "PACKAGE_MONITOR_CIRCUIT_BREAKER_THRESHOLD", 5
+)
+"""Number of consecutive failed requests after which a host of a package index
+is considered unavailable during a refresh.
+
+A request counts as failed when all its attempts failed
+with a network error, a timeout or a server error. Rate limiting does not count.
+
+0 disables this feature.
+"""
+
 PACKAGE_MONITOR_CUSTOM_REQUIREMENTS = clean_setting(
     "PACKAGE_MONITOR_CUSTOM_REQUIREMENTS", default_value=[]
 )
@@ -14,12 +50,26 @@ PACKAGE_MONITOR_EXCLUDE_PACKAGES = clean_setting(
 )
 """Names of distribution packages to be excluded."""
 
-
 PACKAGE_MONITOR_INCLUDE_PACKAGES = clean_setting(
     "PACKAGE_MONITOR_INCLUDE_PACKAGES", default_value=[]
 )
 """Names of additional distribution packages to be monitored."""
 
+PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS = clean_setting(
+    "PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS", 20
+)
+"""Maximum number of concurrent requests to package indexes during a refresh.
+
+0 means unlimited.
+"""
+
+PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS_PER_HOST = clean_setting(
+    "PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS_PER_HOST", 10
+)
+"""Maximum number of concurrent requests to the same host during a refresh.
+
+0 means unlimited.
+"""
 
 PACKAGE_MONITOR_NOTIFICATIONS_ENABLED = clean_setting(
     "PACKAGE_MONITOR_NOTIFICATIONS_ENABLED", False
@@ -28,6 +78,15 @@ PACKAGE_MONITOR_NOTIFICATIONS_ENABLED = clean_setting(
 for a currently installed distribution package.
 """
 
+PACKAGE_MONITOR_NOTIFICATIONS_MAX_DELAY = clean_setting(
+    "PACKAGE_MONITOR_NOTIFICATIONS_MAX_DELAY", 5400
+)
+"""Maximum delay in seconds between the scheduled event for firing a notification
+and the time the notification is issued.
+
+This value should be synchronized with the timing of the recurring task.
+"""
+
 PACKAGE_MONITOR_NOTIFICATIONS_REPEAT = clean_setting(
     "PACKAGE_MONITOR_NOTIFICATIONS_REPEAT", False
 )
@@ -44,32 +103,57 @@ The schedule can be defined in natural language. Examples: "every day at 10:00",
 For more information about the syntax please see: [recurrent package](https://github.com/kvh/recurrent)
 """
 
-PACKAGE_MONITOR_NOTIFICATIONS_MAX_DELAY = clean_setting(
-    "PACKAGE_MONITOR_NOTIFICATIONS_MAX_DELAY", 5400
+PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT = clean_setting(
+    "PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT", 3600 * 24
 )
-"""Maximum delay in seconds between the scheduled event for firing a notification
-and the time the notification is issued.
+"""Time in seconds to remember that a package was not found on a package index.
 
-This value should be synchronized with the timing of the recurring task.
+The package is not requested again from that index during this time.
+0 disables remembering.
 """
 
-PACKAGE_MONITOR_SHOW_ALL_PACKAGES = clean_setting(
-    "PACKAGE_MONITOR_SHOW_ALL_PACKAGES", True
+PACKAGE_MONITOR_PACKAGE_INDEXES = clean_setting(
+    "PACKAGE_MONITOR_PACKAGE_INDEXES",
+    [
+        {
+            "name": "PyPI",
+            "url": "https://pypi.org/pypi",
+            "simple_url": "https://pypi.org/simple",
+        },
+        {
+            "name": "EVE University",
+            "url": "https://pypi.eveuniversity.org",
+            "release_data": False,
+        },
+    ],
 )
-"""Whether to show all distribution packages,
-as opposed to only showing packages that contain Django apps.
+"""Package indexes to fetch projects from, in order of preference.
+
+Each index is defined by a dict with these keys:
+name and url (base URL of the JSON API) are required.
+simple_url is the base URL of the Simple API, if the index provides it.
+priority overrides the order of preference: indexes with a higher priority
+are preferred (default: 0).
+timeout is the timeout for requests in seconds (default: None).
+max_concurrency is the maximum number of concurrent requests
+to the index (default: 0 = unlimited).
+authoritative defines whether less preferred indexes are skipped,
+once this index has a project (default: False).
+release_data defines whether the index provides data for single releases.
+Releases from indexes without release data are not checked against
+protected packages (default: True).
 """
 
-PACKAGE_MONITOR_SHOW_EDITABLE_PACKAGES = clean_setting(
-    "PACKAGE_MONITOR_SHOW_EDITABLE_PACKAGES", False
+PACKAGE_MONITOR_PACKAGE_INDEXES_MERGE_POLICY = clean_setting(
+    "PACKAGE_MONITOR_PACKAGE_INDEXES_MERGE_POLICY", "merge", choices=["merge", "first"]
 )
-"""Whether to show distribution packages installed as editable.
+"""How releases of a project from several package indexes are combined.
 
-Since version information about editable packages is often outdated,
-this type of packages are not shown by default.
+"merge": Releases from all indexes are combined.
+Releases from preferred indexes take precedence.
+"first": Only releases from the most preferred index having the project are used.
 """
 
-
 PACKAGE_MONITOR_PROTECTED_PACKAGES = clean_setting(
     "PACKAGE_MONITOR_PROTECTED_PACKAGES", ["allianceauth", "django"]
 )
@@ -87,3 +171,69 @@ which would cause an indirect update of a protected package.
 
 And empty list disables this feature.
 """
+
+PACKAGE_MONITOR_REFRESH_TIMEOUT = clean_setting("PACKAGE_MONITOR_REFRESH_TIMEOUT", 3000)
+"""Maximum time in seconds for fetching updates during a refresh.
+
+Packages, which have been updated when this time is exceeded, are saved
+and all other packages are reported with an unknown status until the next refresh.
+Should be shorter than the time limit of the refresh task (3600 seconds).
+
+0 disables this feature.
+"""
+
+PACKAGE_MONITOR_REQUEST_TIMEOUT = clean_setting("PACKAGE_MONITOR_REQUEST_TIMEOUT", 60)
+"""Maximum time in seconds for a request to a package index,
+unless the package index defines its own timeout.
+
+0 disables this feature.
+"""
+
+PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS = clean_setting(
+    "PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 4, min_value=1
+)
+"""Maximum number of attempts for a request to a package index.
+
+Requests are retried after server errors, rate limiting and network errors.
+"""
+
+PACKAGE_MONITOR_RETRY_MAX_DELAY = clean_setting("PACKAGE_MONITOR_RETRY_MAX_DELAY", 30)
+"""Maximum delay in seconds before retrying a request to a package index."""
+
+PACKAGE_MONITOR_SHARED_SESSION_ENABLED = clean_setting(
+    "PACKAGE_MONITOR_SHARED_SESSION_ENABLED", True
+)
+"""Whether refreshes in the same worker process share one event loop
+and HTTP session, so connections and resolved hosts can be reused between refreshes.
+"""
+
+PACKAGE_MONITOR_SHOW_ALL_PACKAGES = clean_setting(
+    "PACKAGE_MONITOR_SHOW_ALL_PACKAGES", True
+)
+"""Whether to show all distribution packages,
+as opposed to only showing packages that contain Django apps.
+"""
+
+PACKAGE_MONITOR_SHOW_EDITABLE_PACKAGES = clean_setting(
+    "PACKAGE_MONITOR_SHOW_EDITABLE_PACKAGES", False
+)
+"""Whether to show distribution packages installed as editable.
+
+Since version information about editable packages is often outdated,
+this type of packages are not shown by default.
+"""
+
+PACKAGE_MONITOR_SIMPLE_API_ENABLED = clean_setting(
+    "PACKAGE_MONITOR_SIMPLE_API_ENABLED", False
+)
+"""Whether to fetch projects from PyPI with the Simple API (PEP 691).
+
+The Simple API transfers much less data for large projects than the JSON API.
+The JSON API is used as fallback.
+"""
+
+PACKAGE_MONITOR_UVLOOP_ENABLED = clean_setting("PACKAGE_MONITOR_UVLOOP_ENABLED", False)
+"""Whether to run refreshes on an uvloop event loop.
+
+Requires uvloop to be installed, else the default event loop is used.
+"""
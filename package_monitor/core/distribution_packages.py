@@ -1,6 +1,7 @@
 """Core logic for parsed distribution packages."""
 
 import asyncio
+import contextlib
 import sys
 from collections import defaultdict
 from dataclasses import dataclass, field
@@ -8,27 +9,56 @@ from typing import Dict, List, Optional
 
 import aiohttp
 import importlib_metadata
-from packaging.markers import UndefinedComparison, UndefinedEnvironmentName
 from packaging.requirements import InvalidRequirement, Requirement
-from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.specifiers import SpecifierSet
 from packaging.utils import canonicalize_name
-from packaging.version import InvalidVersion, Version
-from packaging.version import parse as version_parse
+from packaging.version import Version
 
 from allianceauth.services.hooks import get_extension_logger
 from app_utils.logging import LoggerAddTag
 
 from package_monitor import __title__
 from package_monitor.app_settings import (
+    PACKAGE_MONITOR_ADAPTIVE_CONCURRENCY_ENABLED,
     PACKAGE_MONITOR_CUSTOM_REQUIREMENTS,
+    PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS,
+    PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS_PER_HOST,
     PACKAGE_MONITOR_PROTECTED_PACKAGES,
+    PACKAGE_MONITOR_REFRESH_TIMEOUT,
+    PACKAGE_MONITOR_SHARED_SESSION_ENABLED,
 )
 
 from . import metadata_helpers
-from .pypi import fetch_project_from_pypi_async, fetch_project_from_unipypi_async, fetch_pypi_releases
+from .package_indexes import (
+    fetch_project_from_indexes_async,
+    index_host_limits,
+    package_indexes,
+)
+from .pypi import (
+    PackageIndex,
+    ReleaseStore,
+    create_session,
+    fetch_pypi_releases,
+    refresh_scope,
+)
+from .release_index import ReleaseIndex
+from .versions import (
+    is_marker_true,
+    parse_requirement,
+    parse_version,
+    to_version_or_none,
+)
+from .worker_loop import run_in_new_loop, worker_loop
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
+UPDATE_CHECK_WINDOW_SIZE = 4
+"""Number of candidate updates checked concurrently for protected packages."""
+
+
+class _ReleasesNotFetched(Exception):
+    """Releases needed for determining the latest update could not be fetched."""
+
 
 @dataclass
 class DistributionPackage:
@@ -51,19 +81,26 @@ class DistributionPackage:
         """Return normalized name."""
         return canonicalize_name(self.name)
 
+    @property
+    def current_version(self) -> Optional[Version]:
+        """Return the current version or None if it is not known."""
+        return parse_version(self.current) if self.current else None
+
+    @property
+    def latest_version(self) -> Optional[Version]:
+        """Return the latest version or None if it is not known."""
+        return parse_version(self.latest) if self.latest else None
+
     def is_outdated(self) -> Optional[bool]:
         """Is this package outdated?"""
         if self.current and self.latest:
-            return version_parse(self.current) < version_parse(self.latest)
+            return self.current_version < self.latest_version
         return None
 
     def is_prerelease(self) -> bool:
         """Determine if this package is a prerelease."""
-        current_version = version_parse(self.current)
-        current_is_prerelease = (
-            str(current_version) == str(self.current) and current_version.is_prerelease
-        )
-        return current_is_prerelease
+        current_version = to_version_or_none(self.current)
+        return current_version is not None and current_version.is_prerelease
 
     def _package_specifiers_from_requirements(self, requirements: dict) -> SpecifierSet:
         """Return consolidated specifiers for this package from all other packages."""
@@ -79,30 +116,45 @@ class DistributionPackage:
         requirements: dict,
         protected_packages_versions: dict,
         system_python: Version,
+        indexes: Optional[List[PackageIndex]] = None,
     ) -> bool:
-        """Update latest version and URL from PyPI.
+        """Update latest version and URL from package indexes.
+
+        Indexes default to the configured package indexes.
 
         Return True if update was successful, else False.
         """
-        unipypi_data = await fetch_project_from_unipypi_async(session, name=self.name)
-        pypi_data = await fetch_project_from_pypi_async(session, name=self.name)
-        if not (pypi_data or unipypi_data):
+        project = await fetch_project_from_indexes_async(
+            session, name=self.name, indexes=indexes
+        )
+        if not project:
             return False
-        elif unipypi_data and pypi_data:
-            pypi_data["releases"].update(unipypi_data["releases"])
-        elif unipypi_data and not pypi_data:
-            pypi_data = unipypi_data
 
+        pypi_data = project.data
+        release_index = ReleaseIndex(self.name, pypi_data["releases"])
         updates = self._determine_available_updates(
-            pypi_data_releases=pypi_data["releases"],
+            release_index=release_index,
             package_specifiers=self._package_specifiers_from_requirements(requirements),
             system_python=system_python,
         )
-        latest = await self._determine_latest_available_update(
-            session,
-            updates=updates,
-            protected_packages_versions=protected_packages_versions,
-        )
+        metadata_urls = {
+            str(version): url
+            for version in updates
+            if (url := release_index.metadata_urls.get(str(version)))
+        }
+        try:
+            latest = await self._determine_latest_available_update(
+                session,
+                updates=updates,
+                protected_packages_versions=protected_packages_versions,
+                release_indexes=project.release_indexes,
+                metadata_urls=metadata_urls,
+            )
+        except _ReleasesNotFetched as ex:
+            logger.warning(
+                "%s: Failed to fetch releases for checking updates: %s", self, ex
+            )
+            return False
 
         self.latest = str(latest) if latest else self.current
 
@@ -113,107 +165,103 @@ class DistributionPackage:
 
     def _determine_available_updates(
         self,
-        pypi_data_releases: dict,
+        release_index: ReleaseIndex,
         package_specifiers: SpecifierSet,
         system_python: Version,
     ) -> List[Version]:
         """Determine latest valid updates available on PyPI
         and return them as ascending list.
         """
-        updates = []
-        current_version = (
-            version_parse(self.current) if self.current else Version("0.0.0")
+        return release_index.updates(
+            current=self.current_version or Version("0.0.0"),
+            specifiers=package_specifiers,
+            system_python=system_python,
+            allow_prereleases=self.is_prerelease(),
         )
-        for release, release_details in pypi_data_releases.items():
-            version = to_version_or_none(release)
-            if not version:
-                logger.info(
-                    "%s: Ignoring release with invalid version: %s",
-                    self.name,
-                    release,
-                )
-                continue
-
-            if version.is_prerelease and not self.is_prerelease():
-                continue
-
-            if not is_version_in_specifiers(version, package_specifiers):
-                continue
-
-            if version <= current_version:
-                continue
-
-            release_detail = release_details[-1] if len(release_details) > 0 else None
-            if release_detail:
-                if "yanked" in release_detail:
-                    if release_detail["yanked"]:
-                        continue
-
-                if not self._required_python_matches(release_detail, system_python):
-                    continue
-
-            updates.append(version)
-
-        return updates
-
-    def _required_python_matches(
-        self, release_detail, system_python_version: Version
-    ) -> bool:
-        if requires_python := release_detail.get("requires_python"):
-            try:
-                required_python_versions = SpecifierSet(requires_python)
-            except InvalidSpecifier:
-                logger.info(
-                    "%s: Ignoring release with invalid requires_python: %s",
-                    self.name,
-                    requires_python,
-                )
-                return False
-
-            if system_python_version not in required_python_versions:
-                return False
-
-        return True
 
     async def _determine_latest_available_update(
         self,
         session: aiohttp.ClientSession,
         updates: List[Version],
         protected_packages_versions: Dict[str, Version],
+        release_indexes: Optional[Dict[str, PackageIndex]] = None,
+        metadata_urls: Optional[Dict[str, str]] = None,
     ) -> Optional[Version]:
         """Determines latest available and valid update and returns it.
         Or return None if none are available.
+
+        Candidates are checked from newest to oldest in small concurrent windows,
+        so that usually only the newest releases need to be fetched.
+
+        Raises _ReleasesNotFetched when releases newer than the latest valid update
+        could not be fetched, since the latest update is then unknown.
         """
         if not updates:
             return None
 
-        if protected_packages_versions:
-            valid_updates = await self._gather_valid_updates(
-                session, updates, protected_packages_versions
+        candidates = updates[::-1]  # updates are in ascending order
+        if not protected_packages_versions:
+            return candidates[0]
+
+        for start in range(0, len(candidates), UPDATE_CHECK_WINDOW_SIZE):
+            window = candidates[start : start + UPDATE_CHECK_WINDOW_SIZE]
+            valid_updates, failed_updates = await self._gather_valid_updates(
+                session,
+                window,
+                protected_packages_versions,
+                release_indexes,
+                metadata_urls,
             )
-        else:
-            valid_updates = updates
+            latest = max(valid_updates, default=None)
+            if failed_updates and (not latest or max(failed_updates) > latest):
+                raise _ReleasesNotFetched(", ".join(map(str, failed_updates)))
+            if latest:
+                return latest
 
-        valid_updates.sort()
-        latest = valid_updates.pop() if valid_updates else None
-        return latest
+        return None
 
-    async def _gather_valid_updates(self, session, updates, package_versions):
-        valid_updates = []
-        releases = await fetch_pypi_releases(session, name=self.name, releases=updates)
+    async def _gather_valid_updates(
+        self,
+        session,
+        updates,
+        package_versions,
+        release_indexes=None,
+        metadata_urls=None,
+    ):
+        """Return valid updates and updates, which releases could not be fetched."""
+        # releases from indexes without release data can not be checked
+        release_indexes = release_indexes or {}
+        unchecked_updates = [
+            u
+            for u in updates
+            if (index := release_indexes.get(str(u))) and not index.release_data
+        ]
+        updates = [u for u in updates if u not in unchecked_updates]
+        valid_updates = unchecked_updates
+        releases = await fetch_pypi_releases(
+            session,
+            name=self.name,
+            releases=updates,
+            metadata_urls=metadata_urls,
+            release_indexes=release_indexes,
+        )
+        fetched_updates = set()
         for release in releases:
             try:
                 info = release.get("info")
             except AttributeError:
-                continue # Nonetype catch
+                continue  # Nonetype catch
             if not info:
                 continue
 
+            update = parse_version(info["version"])
+            fetched_updates.add(update)
+
             found_issue = False
             requires_dist = info.get("requires_dist") or []
             for req_str in requires_dist:
                 try:
-                    r = Requirement(req_str)
+                    r = parse_requirement(req_str)
                 except InvalidRequirement:
                     continue  # invalid requirements can be ignored
 
@@ -232,20 +280,10 @@ class DistributionPackage:
             if found_issue:
                 continue
 
-            update = version_parse(info["version"])
             valid_updates.append(update)
-        
-        project = await fetch_project_from_unipypi_async(session, name=self.name)
-        try:
-            releases = project["releases"]
-        except TypeError:
-            releases = []
 
-        for release in releases:
-            update = version_parse(release)
-            valid_updates.append(update)
-
-        return valid_updates
+        failed_updates = [u for u in updates if u not in fetched_updates]
+        return valid_updates, failed_updates
 
     @classmethod
     def create_from_metadata_distribution(
@@ -270,19 +308,6 @@ class DistributionPackage:
         return obj
 
 
-def to_version_or_none(version_string: str) -> Optional[Version]:
-    """Convert a version string to a Version object or return None if not possible."""
-    try:
-        version = version_parse(version_string)
-    except InvalidVersion:
-        return None
-
-    if str(version) != str(version_string):
-        return None
-
-    return version
-
-
 def is_version_in_specifiers(version: Version, specifiers: SpecifierSet) -> bool:
     """Return True if version is in specifies."""
     if len(specifiers) == 0:
@@ -334,7 +359,7 @@ def compile_package_requirements(
     # add requirements from settings (if any)
     for requirement_string in PACKAGE_MONITOR_CUSTOM_REQUIREMENTS:
         try:
-            requirement = Requirement(requirement_string)
+            requirement = parse_requirement(requirement_string)
         except InvalidRequirement:
             continue
         _add_valid_requirement(requirements, requirement, "CUSTOM", packages)
@@ -362,43 +387,122 @@ def is_marker_valid(requirement: Requirement) -> bool:
     if not requirement.marker:
         return True
 
-    try:
-        return requirement.marker.evaluate()
-    except (UndefinedEnvironmentName, UndefinedComparison):
-        return False
+    return is_marker_true(str(requirement.marker))
 
 
 def update_packages_from_pypi(
-    packages: Dict[str, DistributionPackage], requirements: dict
+    packages: Dict[str, DistributionPackage],
+    requirements: dict,
+    max_concurrency: Optional[int] = None,
+    max_concurrency_per_host: Optional[int] = None,
+    timeout: Optional[float] = None,
+    releases: Optional[ReleaseStore] = None,
 ) -> None:
     """Update packages with latest versions and URL from PyPI in accordance
     with the given requirements and updates the packages.
+
+    Concurrency limits default to the respective settings. 0 means unlimited.
+
+    releases can provide the release store, which receives the new releases.
+
+    Packages not updated within the timeout in seconds keep an unknown latest version.
+    The timeout defaults to the respective setting. 0 means no timeout.
+
+    When enabled, refreshes run on the event loop of the worker process
+    and reuse its session, else each refresh runs with its own loop and session.
+    Event loops are uvloop loops when enabled.
     """
+    if max_concurrency is None:
+        max_concurrency = PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS
+    if max_concurrency_per_host is None:
+        max_concurrency_per_host = PACKAGE_MONITOR_MAX_CONCURRENT_REQUESTS_PER_HOST
+    if timeout is None:
+        timeout = PACKAGE_MONITOR_REFRESH_TIMEOUT
 
     async def update_packages_from_pypi_async() -> None:
         """Update packages from PyPI concurrently."""
         system_python_version = determine_system_python_version()
         packages_versions = gather_protected_packages_versions(packages)
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                asyncio.create_task(
-                    package.update_from_pypi_async(
-                        session=session,
-                        requirements=requirements,
-                        protected_packages_versions=packages_versions,
-                        system_python=system_python_version,
+        indexes = package_indexes()
+        async with _refresh_session(
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+        ) as session:
+            async with refresh_scope(
+                max_concurrency=max_concurrency,
+                max_concurrency_per_host=max_concurrency_per_host,
+                host_limits=index_host_limits(indexes),
+                adaptive=PACKAGE_MONITOR_ADAPTIVE_CONCURRENCY_ENABLED,
+                releases=releases,
+            ):
+                tasks = [
+                    asyncio.create_task(
+                        package.update_from_pypi_async(
+                            session=session,
+                            requirements=requirements,
+                            protected_packages_versions=packages_versions,
+                            system_python=system_python_version,
+                            indexes=indexes,
+                        )
                     )
+                    for package in packages.values()
+                ]
+                if not tasks:
+                    return
+
+                _, pending = await asyncio.wait(tasks, timeout=timeout or None)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.wait(pending)
+                    logger.warning(
+                        "Refresh timed out after %s seconds. "
+                        "%d packages were not updated and will be retried "
+                        "with the next refresh",
+                        timeout,
+                        len(pending),
+                    )
+
+        for package, task in zip(packages.values(), tasks):
+            if task.cancelled():
+                logger.info("%s: Not updated in time", package)
+            elif exc := task.exception():
+                logger.warning(
+                    "%s: Failed to update from package indexes",
+                    package,
+                    exc_info=exc,
                 )
-                for package in packages.values()
-            ]
-            await asyncio.gather(*tasks)
 
-    asyncio.run(update_packages_from_pypi_async())
+    if PACKAGE_MONITOR_SHARED_SESSION_ENABLED:
+        worker_loop.run(update_packages_from_pypi_async())
+    else:
+        run_in_new_loop(update_packages_from_pypi_async())
+
+
+@contextlib.asynccontextmanager
+async def _refresh_session(max_concurrency: int, max_concurrency_per_host: int):
+    """Provide the session for a refresh.
+
+    This is the shared session of the worker process when enabled,
+    else a new session, which is closed after the refresh.
+    """
+    if PACKAGE_MONITOR_SHARED_SESSION_ENABLED:
+        yield await worker_loop.session(
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+        )
+        return
+
+    async with create_session(
+        max_concurrency=max_concurrency,
+        max_concurrency_per_host=max_concurrency_per_host,
+    ) as session:
+        yield session
 
 
 def determine_system_python_version() -> Version:
     """Return current Python version of this system."""
-    result = version_parse(
+    result = parse_version(
         f"{sys.version_info.major}.{sys.version_info.minor}"
         f".{sys.version_info.micro}"
     )
@@ -417,8 +521,6 @@ def gather_protected_packages_versions(
 
     focus_names = {canonicalize_name(p) for p in focus_packages}
     result = {
-        name: version_parse(p.current)
-        for name, p in packages.items()
-        if name in focus_names
+        name: p.current_version for name, p in packages.items() if name in focus_names
     }
     return result
@@ -10,6 +10,8 @@ from packaging.requirements import InvalidRequirement, Requirement
 
 from django.apps import apps as django_apps
 
+from .versions import parse_requirement
+
 
 def is_distribution_editable(dist: MetadataDistribution) -> bool:
     """Determine if a distribution is an editable install?"""
@@ -77,7 +79,7 @@ def parse_requirements(dist: MetadataDistribution) -> List[Requirement]:
     requirements = []
     for requirement in dist.requires:
         try:
-            requirements.append(Requirement(requirement))
+            requirements.append(parse_requirement(requirement))
         except InvalidRequirement:
             pass
     return requirements
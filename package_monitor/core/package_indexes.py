@@ -0,0 +1,139 @@
+"""Fetch projects from several package indexes."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from package_monitor import __title__
+from package_monitor.app_settings import (
+    PACKAGE_MONITOR_PACKAGE_INDEXES,
+    PACKAGE_MONITOR_PACKAGE_INDEXES_MERGE_POLICY,
+)
+
+from .pypi import PackageIndex, fetch_project_from_index_async
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+MERGE_POLICY_FIRST = "first"
+MERGE_POLICY_MERGE = "merge"
+
+
+@dataclass
+class IndexedProject:
+    """A project merged from package indexes."""
+
+    data: dict
+    """Project data in the format of the JSON API."""
+    release_indexes: Dict[str, PackageIndex]
+    """Package index providing each release."""
+
+
+def package_indexes() -> List[PackageIndex]:
+    """Return package indexes from settings in order of preference."""
+    indexes = []
+    for config in PACKAGE_MONITOR_PACKAGE_INDEXES:
+        try:
+            indexes.append(PackageIndex(**config))
+        except TypeError:
+            logger.warning("Ignoring invalid package index: %s", config)
+
+    return sorted(indexes, key=lambda index: -index.priority)
+
+
+def index_host_limits(indexes: List[PackageIndex]) -> Dict[str, int]:
+    """Return concurrency limits of package indexes by host.
+
+    Indexes sharing a host are limited by the lowest of their limits.
+    """
+    limits = {}
+    for index in indexes:
+        if not index.max_concurrency:
+            continue
+        for host in index.hosts:
+            limits[host] = min(
+                limits.get(host, index.max_concurrency), index.max_concurrency
+            )
+    return limits
+
+
+async def fetch_project_from_indexes_async(
+    session: aiohttp.ClientSession,
+    name: str,
+    indexes: Optional[List[PackageIndex]] = None,
+    merge_policy: Optional[str] = None,
+) -> Optional[IndexedProject]:
+    """Fetch a project from package indexes and return it.
+
+    All indexes are queried concurrently and their answers evaluated
+    in order of preference.
+    Less preferred indexes are skipped once an index has the project,
+    which is authoritative or when the merge policy is "first".
+
+    Indexes and merge policy default to the respective settings.
+
+    Returns None if no index has the project.
+    """
+    if indexes is None:
+        indexes = package_indexes()
+    if merge_policy is None:
+        merge_policy = PACKAGE_MONITOR_PACKAGE_INDEXES_MERGE_POLICY
+
+    tasks = [
+        asyncio.create_task(_fetch_project_from_index_async(session, index, name))
+        for index in indexes
+    ]
+    projects = []
+    try:
+        for index, task in zip(indexes, tasks):
+            data = await task
+            if not data:
+                continue
+
+            projects.append((index, data))
+            if index.authoritative or merge_policy == MERGE_POLICY_FIRST:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()  # skip less preferred indexes, which did not answer yet
+
+    return merge_projects(projects)
+
+
+async def _fetch_project_from_index_async(
+    session: aiohttp.ClientSession, index: PackageIndex, name: str
+) -> Optional[dict]:
+    try:
+        return await fetch_project_from_index_async(session, index, name)
+    except aiohttp.ClientError as ex:
+        logger.warning("%s: Failed to fetch project from %s: %s", name, index, ex)
+        return None
+
+
+def merge_projects(
+    projects: List[Tuple[PackageIndex, dict]]
+) -> Optional[IndexedProject]:
+    """Merge projects from package indexes given in order of preference
+    and return it.
+
+    Releases from preferred indexes take precedence.
+    Returns None if no projects were given.
+    """
+    if not projects:
+        return None
+
+    releases = {}
+    release_indexes = {}
+    for index, project in reversed(projects):
+        for version, files in project.get("releases", {}).items():
+            releases[version] = files
+            release_indexes[version] = index
+
+    _, preferred_project = projects[0]
+    # copy, because fetched data can be shared between callers
+    data = {**preferred_project, "releases": releases}
+    return IndexedProject(data=data, release_indexes=release_indexes)
@@ -1,11 +1,37 @@
 """Fetch data from PyPI."""
 
 import asyncio
+import contextlib
 import hashlib
-from typing import List, Optional
+import json
+import time
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from email.parser import HeaderParser
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+)
+from urllib.parse import urljoin, urlsplit
 
 import aiohttp
-from packaging.version import Version
+from asgiref.sync import sync_to_async
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import InvalidVersion, Version
 
 from django.core.cache import cache
 
@@ -13,62 +39,629 @@ from allianceauth.services.hooks import get_extension_logger
 from app_utils.logging import LoggerAddTag
 
 from package_monitor import __title__
+from package_monitor.app_settings import (
+    PACKAGE_MONITOR_CACHE_COMPRESSION_ENABLED,
+    PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT,
+    PACKAGE_MONITOR_REQUEST_TIMEOUT,
+    PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS,
+    PACKAGE_MONITOR_SIMPLE_API_ENABLED,
+)
+
+from .request_limits import (
+    CircuitBreaker,
+    RequestLimiter,
+    create_circuit_breaker,
+    retry_delay,
+)
+from .versions import parse_version
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
 BASE_URL = "https://pypi.org/pypi"
+SIMPLE_BASE_URL = "https://pypi.org/simple"
+SIMPLE_API_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
 CACHE_TIMEOUT = 3600 * 24
 CACHE_KEY = "package-monitor-pypi-"
+PROJECT_CACHE_TIMEOUT = 3600 * 24 * 7
+DNS_CACHE_TIMEOUT = 600
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+)
+
+# fields of fetched documents, which are needed for determining updates
+PROJECT_INFO_FIELDS = ("name", "project_url")
+RELEASE_INFO_FIELDS = ("name", "version", "requires_dist", "requires_python", "yanked")
+RELEASE_FILE_FIELDS = ("filename", "url", "yanked", "requires_python", "core_metadata")
+SIMPLE_FILE_FIELDS = (
+    "filename",
+    "url",
+    "yanked",
+    "requires-python",
+    "core-metadata",
+    "data-dist-info-metadata",
+)
+
+_JSON_SCALAR_EVENTS = {"string", "number", "boolean", "null"}
+_CACHE_FORMAT_JSON = b"j"
+_CACHE_FORMAT_MSGPACK = b"m"
+
+
+@dataclass(frozen=True)
+class PackageIndex:
+    """A package index providing the JSON API of PyPI."""
+
+    name: str
+    url: str
+    """Base URL of the JSON API."""
+    simple_url: str = ""
+    """Base URL of the Simple API (PEP 691), if the index provides it."""
+    priority: int = 0
+    """Indexes with a higher priority are preferred."""
+    timeout: Optional[float] = None
+    """Timeout in seconds for requests to this index. None means default timeout."""
+    max_concurrency: int = 0
+    """Maximum number of concurrent requests to this index. 0 means unlimited."""
+    authoritative: bool = False
+    """Whether less preferred indexes are skipped once this index has a project."""
+    release_data: bool = True
+    """Whether this index provides data for single releases."""
+
+    def __str__(self) -> str:
+        return self.name
+
+    @property
+    def hosts(self) -> Set[str]:
+        """Return the hosts of this index."""
+        return {urlsplit(url).netloc for url in (self.url, self.simple_url) if url}
+
+    def project_url(self, name: str) -> str:
+        """Return URL of a project in the JSON API."""
+        return f"{self.url.rstrip('/')}/{name}/json"
+
+    def release_url(self, name: str, version: str) -> str:
+        """Return URL of a release in the JSON API."""
+        return f"{self.url.rstrip('/')}/{name}/{version}/json"
+
+    def simple_project_url(self, name: str) -> str:
+        """Return URL of a project in the Simple API."""
+        return f"{self.simple_url.rstrip('/')}/{name}/"
+
+    def project_page_url(self, name: str) -> str:
+        """Return URL of the web page of a project on PyPI
+        or an empty string for other indexes.
+        """
+        if urlsplit(self.url).netloc != urlsplit(BASE_URL).netloc:
+            return ""
+        return f"https://pypi.org/project/{name}/"
+
+
+PYPI_INDEX = PackageIndex(name="PyPI", url=BASE_URL, simple_url=SIMPLE_BASE_URL)
+
+
+@dataclass
+class ReleaseStore:
+    """Releases in the format of the PyPI JSON API
+    by canonical package name and version.
+
+    Known releases are loaded from the database before a refresh
+    and new releases are stored after it,
+    so the event loop does not need to access the database.
+    """
+
+    known: Dict[str, Dict[str, dict]] = field(default_factory=dict)
+    new: Dict[str, Dict[str, dict]] = field(default_factory=dict)
+
+    def releases(self, name: str, versions: Iterable[str]) -> Dict[str, dict]:
+        """Return known and new releases of a package by version."""
+        name = canonicalize_name(name)
+        known = self.known.get(name, {})
+        new = self.new.get(name, {})
+        return {v: release for v in versions if (release := known.get(v) or new.get(v))}
+
+    def add(self, name: str, releases: Dict[str, dict]) -> None:
+        """Add new releases of a package by version."""
+        self.new.setdefault(canonicalize_name(name), {}).update(releases)
+
+
+@dataclass
+class _RefreshState:
+    """State shared by all requests of one refresh."""
+
+    limiter: RequestLimiter = field(default_factory=RequestLimiter)
+    breaker: CircuitBreaker = field(default_factory=create_circuit_breaker)
+    releases: ReleaseStore = field(default_factory=ReleaseStore)
+    inflight: Dict[str, "asyncio.Future[Optional[dict]]"] = field(default_factory=dict)
+    waiters: Dict[str, int] = field(default_factory=dict)
+    """Number of callers waiting for each request in flight."""
+
+
+_refresh_state: ContextVar[Optional[_RefreshState]] = ContextVar(
+    "package_monitor_refresh_state", default=None
+)
+
+
+def _current_refresh_state() -> _RefreshState:
+    """Return state of the current refresh
+    or a new state when called outside of a refresh.
+    """
+    return _refresh_state.get() or _RefreshState()
+
+
+@contextlib.asynccontextmanager
+async def refresh_scope(
+    max_concurrency: int = 0,
+    max_concurrency_per_host: int = 0,
+    host_limits: Optional[Dict[str, int]] = None,
+    adaptive: bool = False,
+    releases: Optional[ReleaseStore] = None,
+):
+    """Set up the state shared by all requests of one refresh.
+
+    releases can provide the release store for this refresh.
+
+    Requests still in flight when leaving the scope are cancelled
+    and awaited, so none are left pending when the event loop is closed.
+    """
+    state = _RefreshState(
+        limiter=RequestLimiter(
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+            host_limits=host_limits,
+            adaptive=adaptive,
+        ),
+        releases=releases if releases is not None else ReleaseStore(),
+    )
+    token = _refresh_state.set(state)
+    try:
+        yield
+    finally:
+        _refresh_state.reset(token)
+        tasks = list(state.inflight.values())
+        for task in tasks:
+            task.cancel()  # requests nobody is waiting for anymore
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_session(
+    max_concurrency: int = 0, max_concurrency_per_host: int = 0
+) -> aiohttp.ClientSession:
+    """Create a new session with a connection pool matching the given limits.
+
+    Resolved hosts are cached, so a long-lived session resolves each host rarely.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=max_concurrency,
+        limit_per_host=max_concurrency_per_host,
+        ttl_dns_cache=DNS_CACHE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(total=PACKAGE_MONITOR_REQUEST_TIMEOUT or None)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
 
 
 async def fetch_pypi_releases(
-    session: aiohttp.ClientSession, name: str, releases: List[Version]
+    session: aiohttp.ClientSession,
+    name: str,
+    releases: List[Version],
+    metadata_urls: Optional[Dict[str, str]] = None,
+    release_indexes: Optional[Dict[str, PackageIndex]] = None,
 ) -> List[dict]:
-    """Fetch and return data for releases of a pypi project."""
+    """Fetch and return data for releases of a pypi project.
+
+    Releases are taken from the release store when known,
+    then from the cache with a single batched request.
+    Only the remaining releases are fetched, cached and added to the store.
+
+    metadata_urls can provide the URLs of core metadata files by version.
+    release_indexes can provide the package index of a release by version,
+    else releases are fetched from PyPI.
+    """
+    metadata_urls = metadata_urls or {}
+    release_indexes = release_indexes or {}
+    versions = [str(r) for r in releases]
+    store = _current_refresh_state().releases
+    known_releases = store.releases(name, versions)
+    missing_versions = [v for v in versions if v not in known_releases]
+    if not missing_versions:
+        return [known_releases[v] for v in versions]
+
+    keys = {v: _make_cache_key(name, v) for v in missing_versions}
+    # the async methods of the cache get and set each key with its own request
+    cached_data = await sync_to_async(cache.get_many)(list(keys.values()))
+    cached_releases = {
+        v: release
+        for v, key in keys.items()
+        if (release := _unpack_cache_value(cached_data.get(key)))
+    }
+    uncached_versions = [v for v in missing_versions if v not in cached_releases]
     tasks = [
         asyncio.create_task(
-            fetch_release_from_pypi_async(session, name=name, version=str(r))
+            _fetch_release_async(
+                session,
+                name=name,
+                version=version,
+                metadata_url=metadata_urls.get(version),
+                index=release_indexes.get(version, PYPI_INDEX),
+            )
         )
-        for r in releases
+        for version in uncached_versions
     ]
-    r = await asyncio.gather(*tasks)
+    fetched_releases = {
+        version: release
+        for version, release in zip(uncached_versions, await asyncio.gather(*tasks))
+        if release
+    }
+    if fetched_releases:
+        await sync_to_async(cache.set_many)(
+            {
+                keys[v]: _pack_cache_value(release)
+                for v, release in fetched_releases.items()
+            },
+            timeout=CACHE_TIMEOUT,
+        )
+
+    new_releases = {
+        version: release
+        for version, release in {**cached_releases, **fetched_releases}.items()
+        if release.get("info")
+    }
+    if new_releases:
+        store.add(name, new_releases)
+
+    r = [known_releases.get(v) or new_releases.get(v) for v in versions]
     return r
 
 
-async def fetch_project_from_pypi_async(
-    session: aiohttp.ClientSession, name: str
+async def fetch_project_from_index_async(
+    session: aiohttp.ClientSession, index: PackageIndex, name: str
 ) -> Optional[dict]:
-    """Fetch project data from PyPI and return it.
+    """Fetch project data from a package index and return it.
+
+    When enabled the project is fetched from the Simple API
+    with a fallback to the JSON API.
+    Data from both APIs is returned in the format of the JSON API.
 
     Returns None if there was an API error.
     """
-    return await _fetch_data_from_pypi_async(session, _make_pypi_url(name))
+    if PACKAGE_MONITOR_SIMPLE_API_ENABLED and index.simple_url:
+        url = index.simple_project_url(name)
+        data = await _fetch_data_from_pypi_async(
+            session,
+            url,
+            revalidate=True,
+            accept=SIMPLE_API_CONTENT_TYPE,
+            projection=_slim_simple_data,
+            package=name,
+            timeout=index.timeout,
+        )
+        if data and "files" in data:
+            return _project_from_simple_api(data, name, url, index)
+
+        logger.info("%s: Falling back to JSON API", name)
 
-async def fetch_project_from_unipypi_async(
+    return await _fetch_data_from_pypi_async(
+        session,
+        index.project_url(name),
+        revalidate=True,
+        projection=_slim_project_data,
+        package=name,
+        timeout=index.timeout,
+        stream_parser=_parse_project_stream if ijson else None,
+    )
+
+
+async def fetch_project_from_pypi_async(
     session: aiohttp.ClientSession, name: str
 ) -> Optional[dict]:
-    """Fetch project data from UNI PyPI and return it.
+    """Fetch project data from PyPI and return it.
 
     Returns None if there was an API error.
     """
-    return await _fetch_data_from_pypi_async(session, _make_unipypi_url(name))
+    return await fetch_project_from_index_async(session, PYPI_INDEX, name)
+
 
 async def fetch_release_from_pypi_async(
-    session: aiohttp.ClientSession, name: str, version: str
+    session: aiohttp.ClientSession,
+    name: str,
+    version: str,
+    metadata_url: Optional[str] = None,
+    index: PackageIndex = PYPI_INDEX,
 ) -> Optional[dict]:
     """Fetch release data from PyPI and return it.
 
+    When the URL of a core metadata file (PEP 658) is given,
+    the release data is taken from that much smaller file instead,
+    with a fallback to the JSON API.
+    Either way the release data is returned in the format of the JSON API,
+    but only contains the info fields needed for determining updates.
+
     Returns None if there was an API error.
     """
     key = _make_cache_key(name, version)
-    if data := await cache.aget(key):
+    if data := _unpack_cache_value(await cache.aget(key)):
         return data
 
-    r = await _fetch_data_from_pypi_async(session, _make_pypi_url(name, version))
-    await cache.aset(key=key, value=r, timeout=CACHE_TIMEOUT)
+    r = await _fetch_release_async(session, name, version, metadata_url, index)
+    if r:
+        await cache.aset(key=key, value=_pack_cache_value(r), timeout=CACHE_TIMEOUT)
     return r
 
 
+async def _fetch_release_async(
+    session: aiohttp.ClientSession,
+    name: str,
+    version: str,
+    metadata_url: Optional[str] = None,
+    index: PackageIndex = PYPI_INDEX,
+) -> Optional[dict]:
+    """Fetch release data from a package index without using the cache
+    and return it.
+    """
+    r = None
+    if metadata_url:
+        r = await _fetch_release_from_metadata_async(session, metadata_url)
+    if not r:
+        r = await _fetch_data_from_pypi_async(
+            session,
+            index.release_url(name, version),
+            projection=_slim_release_data,
+            timeout=index.timeout,
+        )
+    return r
+
+
+async def _fetch_release_from_metadata_async(
+    session: aiohttp.ClientSession, url: str
+) -> Optional[dict]:
+    """Fetch a core metadata file and return it as release data.
+
+    Returns None if there was an API error.
+    """
+    resp = await _get_async(session, url)
+    if not resp:
+        return None
+
+    if not resp.ok:
+        logger.info(
+            "Failed to retrieve metadata from PyPI for url '%s'. Status code: %d",
+            url,
+            resp.status,
+        )
+        return None
+
+    metadata = HeaderParser().parsestr(resp.text())
+    if not metadata.get("Version"):
+        logger.info("Ignoring invalid metadata from url: %s", url)
+        return None
+
+    return {
+        "info": {
+            "name": metadata.get("Name", ""),
+            "version": metadata["Version"],
+            "requires_dist": metadata.get_all("Requires-Dist") or None,
+            "requires_python": metadata.get("Requires-Python", ""),
+        }
+    }
+
+
+def core_metadata_url(release_files: List[dict]) -> Optional[str]:
+    """Return URL of a core metadata file for the files of a release
+    or None if the index does not provide one.
+    """
+    for file in release_files:
+        if (
+            file.get("core_metadata")
+            and file.get("filename", "").endswith(".whl")
+            and file.get("url")
+        ):
+            return f"{file['url']}.metadata"
+    return None
+
+
+def _project_from_simple_api(
+    data: dict, name: str, url: str, index: PackageIndex
+) -> dict:
+    """Convert project data from the Simple API (PEP 691 & PEP 700)
+    into the format of the JSON API.
+
+    Only the data needed for determining updates is included,
+    plus whether a file has core metadata (PEP 658 & PEP 714).
+    """
+    releases = {}
+    versions_map = {}
+    for version_string in data.get("versions", []):
+        releases[version_string] = []
+        try:
+            versions_map[parse_version(version_string)] = version_string
+        except InvalidVersion:
+            pass
+
+    for file in data["files"]:
+        version = _version_from_filename(file["filename"])
+        if not version:
+            continue
+        version_string = versions_map.get(version, str(version))
+        releases.setdefault(version_string, []).append(
+            {
+                "filename": file["filename"],
+                "url": urljoin(url, file["url"]) if file.get("url") else "",
+                "yanked": bool(file.get("yanked", False)),
+                "requires_python": file.get("requires-python") or "",
+                "core_metadata": bool(
+                    file.get("core-metadata", file.get("data-dist-info-metadata"))
+                ),
+            }
+        )
+
+    project_name = data.get("name") or name
+    return {
+        "info": {
+            "name": project_name,
+            "project_url": index.project_page_url(project_name),
+        },
+        "releases": releases,
+    }
+
+
+def _version_from_filename(filename: str) -> Optional[Version]:
+    """Return version of a distribution file or None if it can not be identified."""
+    try:
+        if filename.endswith(".whl"):
+            _, version, _, _ = parse_wheel_filename(filename)
+        else:
+            _, version = parse_sdist_filename(filename)
+    except (InvalidSdistFilename, InvalidWheelFilename, InvalidVersion):
+        return None
+    return version
+
+
+def _slim_project_data(data: dict) -> dict:
+    """Return project data from the JSON API reduced to the needed fields.
+
+    Only the last file of each release is kept,
+    since that is the file used for determining updates.
+    """
+    r = {}
+    if isinstance(data.get("info"), dict):
+        r["info"] = _pick_fields(data["info"], PROJECT_INFO_FIELDS)
+    if isinstance(data.get("releases"), dict):
+        r["releases"] = {
+            version: [_pick_fields(files[-1], RELEASE_FILE_FIELDS)] if files else []
+            for version, files in data["releases"].items()
+        }
+    return r
+
+
+async def _parse_project_stream(stream: aiohttp.StreamReader) -> Optional[dict]:
+    """Parse project data from the JSON API incrementally from a stream
+    and return it reduced to the needed fields.
+
+    This produces the same result as _slim_project_data,
+    but never holds the complete document in memory.
+
+    Returns None if the document is not valid JSON.
+    """
+    r = {}
+    info_prefixes = {f"info.{key}": key for key in PROJECT_INFO_FIELDS}
+    version = None
+    file_prefix = None
+    file_prefixes = {}
+    file = {}
+    try:
+        async for prefix, event, value in ijson.parse_async(stream, use_float=True):
+            if prefix in info_prefixes and event in _JSON_SCALAR_EVENTS:
+                r["info"][info_prefixes[prefix]] = value
+            elif prefix in ("info", "releases") and event == "start_map":
+                r[prefix] = {}
+            elif prefix == "releases" and event == "map_key":
+                version = value
+                r["releases"][version] = []
+                file_prefix = f"releases.{version}.item"
+                file_prefixes = {
+                    f"{file_prefix}.{key}": key for key in RELEASE_FILE_FIELDS
+                }
+            elif prefix == file_prefix and event == "start_map":
+                file = {}
+            elif prefix == file_prefix and event == "end_map":
+                r["releases"][version] = [file]  # keep only the last file
+            elif prefix in file_prefixes and event in _JSON_SCALAR_EVENTS:
+                file[file_prefixes[prefix]] = value
+    except ijson.JSONError:
+        return None
+
+    return r
+
+
+def _slim_release_data(data: dict) -> dict:
+    """Return release data from the JSON API reduced to the needed fields."""
+    if not isinstance(data.get("info"), dict):
+        return {}
+    return {"info": _pick_fields(data["info"], RELEASE_INFO_FIELDS)}
+
+
+def _slim_simple_data(data: dict) -> dict:
+    """Return project data from the Simple API reduced to the needed fields."""
+    r = {key: data[key] for key in ("name", "versions") if key in data}
+    if isinstance(data.get("files"), list):
+        r["files"] = [_pick_fields(file, SIMPLE_FILE_FIELDS) for file in data["files"]]
+    return r
+
+
+def _pick_fields(data: dict, fields: Iterable[str]) -> dict:
+    return {key: data[key] for key in fields if key in data}
+
+
+def _pack_cache_value(value: Any) -> Any:
+    """Return a value in compact form for storing in the cache.
+
+    Values are serialized with msgpack when installed, else with JSON,
+    and then compressed with zlib.
+    Values are returned unchanged when compression is disabled.
+    """
+    if not PACKAGE_MONITOR_CACHE_COMPRESSION_ENABLED or value is None:
+        return value
+
+    if msgpack:
+        return _CACHE_FORMAT_MSGPACK + zlib.compress(msgpack.packb(value))
+
+    payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return _CACHE_FORMAT_JSON + zlib.compress(payload)
+
+
+def _unpack_cache_value(value: Any) -> Any:
+    """Return a value from the cache in its original form.
+
+    Returns None if the value can not be restored.
+    """
+    if not isinstance(value, bytes):
+        return value  # stored uncompressed
+
+    cache_format = value[:1]
+    try:
+        payload = zlib.decompress(value[1:])
+        if cache_format == _CACHE_FORMAT_MSGPACK:
+            if not msgpack:
+                return None
+            return msgpack.unpackb(payload)
+        if cache_format == _CACHE_FORMAT_JSON:
+            return _json_loads(payload)
+    except (zlib.error, ValueError):  # ValueError also covers msgpack errors
+        logger.warning("Ignoring invalid value from cache", exc_info=True)
+        return None
+
+    return None
+
+
+def _json_loads(data: bytes) -> Any:
+    """Decode a JSON document and return it.
+
+    Documents are decoded with orjson when installed, else with the standard library.
+
+    Raises ValueError if the document is not valid JSON.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def _make_cache_key(name: str, version: str) -> str:
     b = f"{name}-{version}".encode("utf-8")
     key_hash = hashlib.md5(b).hexdigest()
@@ -76,43 +669,307 @@ def _make_cache_key(name: str, version: str) -> str:
     return key
 
 
-def _make_pypi_url(name: str, version: Optional[str] = None) -> str:
-    if not version:
-        return f"{BASE_URL}/{name}/json"
-    return f"{BASE_URL}/{name}/{version}/json"
+def _make_url_cache_key(url: str) -> str:
+    key_hash = hashlib.md5(url.encode("utf-8")).hexdigest()
+    key = f"{CACHE_KEY}url-{key_hash}"
+    return key
+
+
+def _make_not_found_cache_key(url: str, package: str) -> str:
+    b = f"{url}-{canonicalize_name(package)}".encode("utf-8")
+    key_hash = hashlib.md5(b).hexdigest()
+    key = f"{CACHE_KEY}not-found-{key_hash}"
+    return key
 
-def _make_unipypi_url(name: str, version: Optional[str] = None) -> str:
-    if not version:
-        return f"https://pypi.eveuniversity.org/{name}/json"
-    return f"https://pypi.eveuniversity.org/{name}/{version}/json"
 
 async def _fetch_data_from_pypi_async(
-    session: aiohttp.ClientSession, url: str
+    session: aiohttp.ClientSession,
+    url: str,
+    revalidate: bool = False,
+    accept: str = "application/json",
+    projection: Optional[Callable[[dict], dict]] = None,
+    package: Optional[str] = None,
+    timeout: Optional[float] = None,
+    stream_parser: Optional[Callable[[aiohttp.StreamReader], Awaitable[Any]]] = None,
 ) -> Optional[dict]:
     """Fetch JSON data for a URL and return it.
 
+    Concurrent requests for the same URL within a refresh share one request.
+    The shared request is aborted when all callers waiting for it are cancelled.
+
+    A projection can reduce the data to the needed fields,
+    before it is returned and stored.
+
+    When the URL is for a package, a package not found on an index
+    is remembered for a while and not requested again from that index.
+
+    A timeout in seconds can replace the default timeout of the session.
+
+    A stream parser can parse the response while it is received.
+    It replaces the projection and must return the already reduced data.
+
+    When revalidate is enabled, the response is stored together with its validators
+    and later requests are made conditional, so an unchanged document
+    is not transferred again.
+
     Returns None if there was an API error.
     """
-    logger.info("Fetching data from PyPI for url: %s", url)
-
-    async with session.get(url) as resp:
-        if not resp.ok:
-            if resp.status == 404:
-                logger.info("PyPI URL not found: %s", url)
-            else:
-                logger.warning(
-                    "Failed to retrieve data from PyPI for "
-                    "url '%s'. "
-                    "Status code: %d, "
-                    "response: %s",
+    state = _current_refresh_state()
+    inflight = state.inflight
+    if url not in inflight:
+        task = asyncio.ensure_future(
+            _fetch_url_async(
+                session,
+                url,
+                revalidate,
+                accept,
+                projection,
+                package,
+                timeout,
+                stream_parser,
+            )
+        )
+        inflight[url] = task
+
+        def _request_done(task: asyncio.Future):
+            if inflight.get(url) is task:
+                del inflight[url]
+            if not task.cancelled():
+                task.exception()  # retrieved, in case all callers were cancelled
+
+        task.add_done_callback(_request_done)
+
+    task = inflight[url]
+    state.waiters[url] = state.waiters.get(url, 0) + 1
+    try:
+        # shield the shared request from being cancelled by a single caller
+        return await asyncio.shield(task)
+    finally:
+        state.waiters[url] -= 1
+        if not state.waiters[url]:
+            del state.waiters[url]
+            if not task.done():
+                # abort requests nobody is waiting for anymore
+                inflight.pop(url, None)
+                task.cancel()
+
+
+async def _fetch_url_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    revalidate: bool,
+    accept: str,
+    projection: Optional[Callable[[dict], dict]],
+    package: Optional[str],
+    timeout: Optional[float],
+    stream_parser: Optional[Callable[[aiohttp.StreamReader], Awaitable[Any]]],
+) -> Optional[dict]:
+    not_found_key = (
+        _make_not_found_cache_key(url, package)
+        if package and PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT
+        else None
+    )
+    if not_found_key and await cache.aget(not_found_key):
+        logger.debug("PyPI URL known to be not found: %s", url)
+        return None
+
+    stored = None
+    headers = {"Accept": accept}
+    if revalidate:
+        key = _make_url_cache_key(url)
+        if stored := _unpack_cache_value(await cache.aget(key)):
+            if stored["etag"]:
+                headers["If-None-Match"] = stored["etag"]
+            if stored["last_modified"]:
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+    resp = await _get_async(
+        session, url, headers=headers, timeout=timeout, stream_parser=stream_parser
+    )
+    if not resp:
+        return None
+
+    if resp.status == 304 and stored:
+        logger.debug("PyPI URL not modified: %s", url)
+        return stored["data"]
+
+    if not resp.ok:
+        if resp.status == 404:
+            logger.info("PyPI URL not found: %s", url)
+            if not_found_key:
+                await cache.aset(
+                    key=not_found_key,
+                    value=True,
+                    timeout=PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT,
+                )
+        else:
+            logger.warning(
+                "Failed to retrieve data from PyPI for "
+                "url '%s'. "
+                "Status code: %d, "
+                "response: %s",
+                url,
+                resp.status,
+                resp.text(),
+            )
+        return None
+
+    if "json" not in resp.content_type:
+        logger.warning(
+            "Unexpected content type from PyPI for url '%s': %s",
+            url,
+            resp.content_type,
+        )
+        return None
+
+    if resp.is_parsed:
+        data = resp.data
+        if data is None:
+            logger.warning("Invalid JSON from PyPI for url: %s", url)
+            return None
+    else:
+        try:
+            data = _json_loads(resp.body)
+        except ValueError:
+            logger.warning("Invalid JSON from PyPI for url: %s", url)
+            return None
+
+        if projection and isinstance(data, dict):
+            data = projection(data)
+
+    etag = resp.headers.get("ETag", "")
+    last_modified = resp.headers.get("Last-Modified", "")
+
+    if revalidate and (etag or last_modified):
+        await cache.aset(
+            key=key,
+            value=_pack_cache_value(
+                {"etag": etag, "last_modified": last_modified, "data": data}
+            ),
+            timeout=PROJECT_CACHE_TIMEOUT,
+        )
+    return data
+
+
+@dataclass
+class _Response:
+    """A response with its body already read."""
+
+    status: int
+    headers: Mapping[str, str]
+    content_type: str
+    body: bytes = b""
+    charset: Optional[str] = None
+    data: Any = None
+    """Data parsed while receiving the response."""
+    is_parsed: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the status is not an error."""
+        return self.status < 400
+
+    def text(self) -> str:
+        """Return the body as text."""
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+
+async def _get_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    stream_parser: Optional[Callable[[aiohttp.StreamReader], Awaitable[Any]]] = None,
+) -> Optional[_Response]:
+    """Make a GET request and return the response.
+
+    When a stream parser is given, a successful JSON response
+    is parsed incrementally while it is received, instead of reading its body.
+
+    Requests failing with a transient error are retried
+    with bounded exponential backoff and jitter,
+    honoring the Retry-After header of a response.
+
+    Requests to hosts, which are failing repeatedly, are skipped for a while.
+    A request counts as failed for its host once when all attempts failed
+    with a network error, a timeout or a server error.
+
+    Returns the last response when all attempts failed with a transient status
+    or None when no response was received.
+    """
+    kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+    state = _current_refresh_state()
+    limiter = state.limiter
+    breaker = state.breaker
+    attempts = max(1, PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS)
+    for attempt in range(1, attempts + 1):
+        if not breaker.allow(url):
+            logger.info("Skipping request to unavailable host: %s", url)
+            return None
+
+        resp, error = None, None
+        started = time.monotonic()
+        try:
+            async with limiter.slot(url):
+                logger.info("Fetching data from PyPI for url: %s", url)
+                started = time.monotonic()
+                async with session.get(url, headers=headers, **kwargs) as r:
+                    body, data, is_parsed = b"", None, False
+                    if stream_parser and r.status == 200 and "json" in r.content_type:
+                        data = await stream_parser(r.content)
+                        is_parsed = True
+                    else:
+                        body = await r.read()
+                    # set only after the body was read, so failed reads are retried
+                    resp = _Response(
+                        status=r.status,
+                        headers=r.headers,
+                        content_type=r.content_type,
+                        body=body,
+                        charset=r.charset,
+                        data=data,
+                        is_parsed=is_parsed,
+                    )
+                limiter.record(
                     url,
-                    resp.status,
-                    await resp.text(),
+                    ok=resp.status not in RETRY_STATUS_CODES,
+                    latency=time.monotonic() - started,
                 )
+
+        except RETRY_EXCEPTIONS as ex:
+            limiter.record(url, ok=False, latency=time.monotonic() - started)
+            error = ex
+        except aiohttp.ClientError as ex:
+            logger.warning("Failed to retrieve data for url '%s': %r", url, ex)
             return None
 
-        data = await resp.json()
-        return data
+        if resp and resp.status not in RETRY_STATUS_CODES:
+            breaker.record_success(url)
+            return resp
+
+        if attempt == attempts:
+            break
+
+        delay = retry_delay(attempt, resp.headers if resp else None)
+        logger.info(
+            "Retrying request in %.1f seconds after %s: %s",
+            delay,
+            resp.status if resp else repr(error),
+            url,
+        )
+        await asyncio.sleep(delay)
+
+    # rate limiting is handled by retries and adaptive concurrency
+    if not resp or resp.status >= 500:
+        breaker.record_failure(url)
+    if not resp:
+        logger.warning(
+            "Failed to retrieve data for url '%s' after %d attempts: %r",
+            url,
+            attempts,
+            error,
+        )
+    return resp
 
 
 def clear_cache():
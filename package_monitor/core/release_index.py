@@ -0,0 +1,130 @@
+"""A compact index of the releases of a project."""
+
+import sys
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import Version
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from package_monitor import __title__
+
+from .pypi import core_metadata_url
+from .specifier_intervals import filter_indexes_in_specifiers
+from .versions import is_python_supported, to_version_or_none
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+
+class ReleaseIndex:
+    """Releases of a project sorted by version.
+
+    The properties of the releases needed for determining updates
+    are kept in arrays parallel to the versions.
+    Properties are taken from the last file of a release.
+    """
+
+    def __init__(self, name: str, releases: Dict[str, List[dict]]) -> None:
+        self.name = name
+        parsed = []
+        for release, files in releases.items():
+            version = to_version_or_none(release)
+            if not version:
+                logger.info(
+                    "%s: Ignoring release with invalid version: %s", name, release
+                )
+                continue
+            parsed.append((version, release, files))
+
+        parsed.sort(key=lambda obj: obj[0])
+        self.versions: List[Version] = [version for version, _, _ in parsed]
+        self.releases: List[str] = [release for _, release, _ in parsed]
+        self.is_prerelease = bytearray(
+            version.is_prerelease for version in self.versions
+        )
+        self.is_yanked = bytearray(len(parsed))
+        self.requires_python: List[Optional[str]] = [None] * len(parsed)
+        self.metadata_urls: Dict[str, str] = {}
+        """URLs of core metadata files by release, when provided by the index."""
+
+        for i, (_, release, files) in enumerate(parsed):
+            if not files:
+                continue
+            file = files[-1]
+            self.is_yanked[i] = bool(file.get("yanked"))
+            requires_python = file.get("requires_python")
+            if requires_python and isinstance(requires_python, str):
+                self.requires_python[i] = sys.intern(requires_python)
+            if url := core_metadata_url(files):
+                self.metadata_urls[release] = url
+
+        self._python_matches: Dict[Version, bytearray] = {}
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, releases={len(self)})"
+
+    def updates(
+        self,
+        current: Version,
+        specifiers: SpecifierSet,
+        system_python: Version,
+        allow_prereleases: bool = False,
+    ) -> List[Version]:
+        """Return versions of valid updates for the current version
+        in ascending order.
+
+        Updates are newer than the current version, match the specifiers,
+        are not yanked and support the system Python.
+        Pre-releases are only updates when allowed.
+        """
+        start = bisect_right(self.versions, current)
+        python_matches = self._python_matches_for(system_python)
+        updates = []
+        for i in filter_indexes_in_specifiers(self.versions, specifiers, start):
+            if self.is_prerelease[i] and not allow_prereleases:
+                continue
+            if self.is_yanked[i] or not python_matches[i]:
+                continue
+            updates.append(self.versions[i])
+        return updates
+
+    def _python_matches_for(self, python_version: Version) -> bytearray:
+        """Return for each release whether it supports a Python version."""
+        try:
+            return self._python_matches[python_version]
+        except KeyError:
+            pass
+
+        results = {}
+        matches = bytearray(len(self))
+        for i, requires_python in enumerate(self.requires_python):
+            if not requires_python:
+                matches[i] = True
+                continue
+            if requires_python not in results:
+                results[requires_python] = self._is_python_supported(
+                    requires_python, python_version
+                )
+            matches[i] = results[requires_python]
+
+        self._python_matches[python_version] = matches
+        return matches
+
+    def _is_python_supported(
+        self, requires_python: str, python_version: Version
+    ) -> bool:
+        try:
+            return is_python_supported(requires_python, python_version)
+        except InvalidSpecifier:
+            logger.info(
+                "%s: Ignoring releases with invalid requires_python: %s",
+                self.name,
+                requires_python,
+            )
+            return False
@@ -0,0 +1,260 @@
+"""Limit concurrent requests to hosts, delay retries and skip failing hosts."""
+
+import asyncio
+import contextlib
+import datetime as dt
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from package_monitor import __title__
+from package_monitor.app_settings import (
+    PACKAGE_MONITOR_CIRCUIT_BREAKER_COOLDOWN,
+    PACKAGE_MONITOR_CIRCUIT_BREAKER_THRESHOLD,
+    PACKAGE_MONITOR_RETRY_MAX_DELAY,
+)
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+ADAPTIVE_DECREASE_FACTOR = 0.5
+ADAPTIVE_LATENCY_SMOOTHING = 0.2
+ADAPTIVE_LATENCY_SPIKE_FACTOR = 4
+ADAPTIVE_MAX_CONCURRENCY = 50
+RETRY_BACKOFF_BASE = 0.5
+
+
+class AdaptiveConcurrency:
+    """Adapt the number of concurrent requests to a host
+    with AIMD (additive increase, multiplicative decrease).
+
+    The limit grows by one after a full window of healthy requests
+    and is cut in half on congestion, i.e. failed requests or latency spikes.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        initial_limit: Optional[int] = None,
+        min_limit: int = 1,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(
+            min(self.max_limit, initial_limit or max(min_limit, self.max_limit // 2))
+        )
+        self._in_use = 0
+        self._condition = asyncio.Condition()
+        self._latency: Optional[float] = None
+        self._last_decrease = -math.inf
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Wait until the current limit allows another request and hold the slot."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_use < int(self.limit))
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._in_use -= 1
+                self._condition.notify_all()
+
+    def record(self, ok: bool, latency: float):
+        """Record the outcome of a request and adapt the limit."""
+        is_spike = (
+            self._latency is not None
+            and latency > self._latency * ADAPTIVE_LATENCY_SPIKE_FACTOR
+        )
+        self._latency = (
+            latency
+            if self._latency is None
+            else self._latency + ADAPTIVE_LATENCY_SMOOTHING * (latency - self._latency)
+        )
+        if ok and not is_spike:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            return
+
+        # decrease only once for requests running into the same congestion
+        now = time.monotonic()
+        if now - self._last_decrease < self._latency:
+            return
+
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * ADAPTIVE_DECREASE_FACTOR)
+
+
+class RequestLimiter:
+    """Limit the number of concurrent requests in total and per host.
+
+    Hosts can have their own limits, which apply in addition to the limit per host.
+    A limit of 0 means unlimited.
+
+    When adaptive, the concurrency per host is adapted to the health of the host
+    and the limits per host are the upper bounds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 0,
+        max_concurrency_per_host: int = 0,
+        host_limits: Optional[Dict[str, int]] = None,
+        adaptive: bool = False,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.host_limits = host_limits or {}
+        self.adaptive = adaptive
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        )
+        self._host_semaphores: Dict[str, Optional[asyncio.Semaphore]] = {}
+        self._host_concurrencies: Dict[str, AdaptiveConcurrency] = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """Wait for a free request slot for this URL and hold it."""
+        async with contextlib.AsyncExitStack() as stack:
+            # acquire the host first, so we do not block a global slot while waiting
+            if self.adaptive:
+                await stack.enter_async_context(self._host_concurrency(url).slot())
+            elif host_semaphore := self._host_semaphore(url):
+                await stack.enter_async_context(host_semaphore)
+            if self._semaphore:
+                await stack.enter_async_context(self._semaphore)
+            yield
+
+    def record(self, url: str, ok: bool, latency: float):
+        """Record the outcome of a request to this URL."""
+        if self.adaptive:
+            self._host_concurrency(url).record(ok=ok, latency=latency)
+
+    def _host_concurrency(self, url: str) -> AdaptiveConcurrency:
+        host = urlsplit(url).netloc
+        if host not in self._host_concurrencies:
+            self._host_concurrencies[host] = AdaptiveConcurrency(
+                max_limit=self._host_limit(host) or ADAPTIVE_MAX_CONCURRENCY
+            )
+        return self._host_concurrencies[host]
+
+    def _host_semaphore(self, url: str) -> Optional[asyncio.Semaphore]:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            limit = self._host_limit(host)
+            self._host_semaphores[host] = asyncio.Semaphore(limit) if limit else None
+        return self._host_semaphores[host]
+
+    def _host_limit(self, host: str) -> int:
+        limits = [
+            limit
+            for limit in (self.max_concurrency_per_host, self.host_limits.get(host, 0))
+            if limit
+        ]
+        return min(limits) if limits else 0
+
+
+class CircuitBreaker:
+    """Stop sending requests to hosts, which are failing repeatedly.
+
+    After a number of consecutive failures the circuit for a host opens
+    and requests to that host are skipped for a cool-down period.
+    Then a single trial request is let through, which closes the circuit
+    when it succeeds.
+
+    A failure threshold of 0 disables the circuit breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 0, cooldown: float = 0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+
+    def allow(self, url: str) -> bool:
+        """Return True if a request to this URL can be sent."""
+        if not self.failure_threshold:
+            return True
+
+        host = urlsplit(url).netloc
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return True
+
+        now = time.monotonic()
+        if now - opened_at < self.cooldown:
+            return False
+
+        # let this request through as trial and hold back the others
+        self._opened_at[host] = now
+        return True
+
+    def record_success(self, url: str):
+        """Record a successful request to this URL."""
+        host = urlsplit(url).netloc
+        self._failures.pop(host, None)
+        if self._opened_at.pop(host, None):
+            logger.info("Host is available again: %s", host)
+
+    def record_failure(self, url: str):
+        """Record a failed request to this URL."""
+        if not self.failure_threshold:
+            return
+
+        host = urlsplit(url).netloc
+        self._failures[host] = self._failures.get(host, 0) + 1
+        if self._failures[host] >= self.failure_threshold:
+            if host not in self._opened_at:
+                logger.warning(
+                    "Host is unavailable. Skipping requests for %s seconds: %s",
+                    self.cooldown,
+                    host,
+                )
+            self._opened_at[host] = time.monotonic()
+
+
+def create_circuit_breaker() -> CircuitBreaker:
+    """Create a circuit breaker configured by the settings."""
+    return CircuitBreaker(
+        failure_threshold=PACKAGE_MONITOR_CIRCUIT_BREAKER_THRESHOLD,
+        cooldown=PACKAGE_MONITOR_CIRCUIT_BREAKER_COOLDOWN,
+    )
+
+
+def retry_delay(attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+    """Return delay in seconds before the next attempt,
+    honoring the Retry-After header of the last response.
+    """
+    if headers and (retry_after := _parse_retry_after(headers.get("Retry-After"))):
+        return min(retry_after, PACKAGE_MONITOR_RETRY_MAX_DELAY)
+
+    backoff = min(
+        RETRY_BACKOFF_BASE * 2 ** (attempt - 1), PACKAGE_MONITOR_RETRY_MAX_DELAY
+    )
+    return random.uniform(0, backoff)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return delay in seconds from a Retry-After header
+    or None if it is missing or invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if not retry_at.tzinfo:
+        retry_at = retry_at.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (retry_at - dt.datetime.now(dt.timezone.utc)).total_seconds())
@@ -0,0 +1,268 @@
+"""Compile version specifiers into intervals for filtering many versions at once."""
+
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from packaging.specifiers import Specifier, SpecifierSet
+from packaging.version import Version
+
+SPECIFIERS_CACHE_SIZE = 1024
+"""Maximum number of compiled specifiers kept in the cache."""
+
+
+class Interval(NamedTuple):
+    """An interval of versions. A missing bound means the interval is unbounded.
+
+    An exclusive lower bound also excludes local versions of the bound
+    and an inclusive upper bound also includes them,
+    in accordance with the comparison of versions in specifiers.
+    """
+
+    lower: Optional[Version] = None
+    lower_inclusive: bool = False
+    upper: Optional[Version] = None
+    upper_inclusive: bool = False
+
+    def is_empty(self) -> bool:
+        """Return True if no version can be in this interval."""
+        if self.lower is None or self.upper is None:
+            return False
+        if self.lower == self.upper:
+            return not (self.lower_inclusive and self.upper_inclusive)
+        return self.lower > self.upper
+
+    def intersection(self, other: "Interval") -> "Interval":
+        """Return the intersection of this and another interval."""
+        lower = max(self, other, key=_lower_key)
+        upper = min(self, other, key=_upper_key)
+        return Interval(
+            lower.lower, lower.lower_inclusive, upper.upper, upper.upper_inclusive
+        )
+
+
+def _lower_key(interval: Interval) -> tuple:
+    if interval.lower is None:
+        return (0,)
+    return (1, interval.lower, not interval.lower_inclusive)
+
+
+def _upper_key(interval: Interval) -> tuple:
+    if interval.upper is None:
+        return (1,)
+    return (0, interval.upper, interval.upper_inclusive)
+
+
+class CompiledSpecifiers:
+    """Specifiers compiled into sorted, disjoint intervals of versions.
+
+    Versions in the intervals match the specifiers by their order alone.
+    Versions needing more than their order for a match, e.g. pre-releases
+    and post-releases at the bound of an exclusive comparison,
+    are checked against the specifiers directly.
+    """
+
+    def __init__(
+        self,
+        specifiers: SpecifierSet,
+        intervals: Sequence[Interval],
+        boundaries: FrozenSet[Tuple[int, Tuple[int, ...]]] = frozenset(),
+    ) -> None:
+        self.specifiers = specifiers
+        self.intervals = tuple(intervals)
+        self.boundaries = boundaries
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.specifiers)!r})"
+
+    def __contains__(self, version: Version) -> bool:
+        return bool(self.filter([version]))
+
+    def filter(self, versions: Sequence[Version]) -> List[Version]:
+        """Return the versions matching the specifiers.
+
+        The versions must be sorted in ascending order.
+        The matching versions are returned in the same order.
+        """
+        return [versions[i] for i in self.filter_indexes(versions)]
+
+    def filter_indexes(self, versions: Sequence[Version], start: int = 0) -> List[int]:
+        """Return the indexes of the versions matching the specifiers
+        in ascending order.
+
+        The versions must be sorted in ascending order.
+        Versions before the start index are skipped.
+        """
+        result = []
+        for interval in self.intervals:
+            lower = max(start, _lower_index(versions, interval))
+            upper = _upper_index(versions, interval)
+            for i in range(lower, upper):
+                version = versions[i]
+                if self._needs_check(version) and version not in self.specifiers:
+                    continue
+                result.append(i)
+        return result
+
+    def _needs_check(self, version: Version) -> bool:
+        if not self.specifiers:
+            return False  # an empty specifier matches all versions
+        if version.is_prerelease:
+            return True
+        if version.is_postrelease or version.local is not None:
+            return _base_key(version) in self.boundaries
+        return False
+
+
+@lru_cache(maxsize=SPECIFIERS_CACHE_SIZE)
+def compile_specifiers(specifiers: SpecifierSet) -> Optional[CompiledSpecifiers]:
+    """Compile specifiers into intervals and return them.
+
+    Returns None if the specifiers can not be compiled,
+    e.g. because they contain arbitrary equality or local versions.
+    """
+    intervals = [Interval()]
+    boundaries = set()
+    for specifier in specifiers:
+        specifier_intervals = _specifier_intervals(specifier)
+        if specifier_intervals is None:
+            return None
+
+        intervals = _intersection(intervals, specifier_intervals)
+        if specifier.operator in ("<", ">"):
+            boundaries.add(_base_key(Version(specifier.version)))
+
+    return CompiledSpecifiers(specifiers, intervals, frozenset(boundaries))
+
+
+def filter_indexes_in_specifiers(
+    versions: Sequence[Version], specifiers: SpecifierSet, start: int = 0
+) -> List[int]:
+    """Return the indexes of the versions in specifiers in ascending order.
+
+    The versions must be sorted in ascending order.
+    Versions before the start index are skipped.
+    Specifiers, which can not be compiled, are checked for each version.
+    """
+    if len(specifiers) == 0:
+        return list(range(start, len(versions)))
+
+    if compiled := compile_specifiers(specifiers):
+        return compiled.filter_indexes(versions, start)
+
+    return [i for i in range(start, len(versions)) if versions[i] in specifiers]
+
+
+def _specifier_intervals(specifier: Specifier) -> Optional[List[Interval]]:
+    """Return the intervals of versions matching a specifier by their order
+    or None if the specifier is not supported.
+    """
+    operator = specifier.operator
+    if operator == "===":
+        return None
+
+    if specifier.version.endswith(".*"):
+        prefix = Version(specifier.version[:-2])
+        interval = _prefix_interval(prefix)
+        if operator == "==":
+            return [interval]
+        if operator == "!=":
+            return _complement(interval)
+        return None
+
+    version = Version(specifier.version)
+    if version.local is not None:
+        return None
+
+    if operator == ">=":
+        return [Interval(lower=version, lower_inclusive=True)]
+    if operator == ">":
+        return [Interval(lower=version)]
+    if operator == "<=":
+        return [Interval(upper=version, upper_inclusive=True)]
+    if operator == "<":
+        return [Interval(upper=version)]
+    if operator == "==":
+        return [Interval(version, True, version, True)]
+    if operator == "!=":
+        return _complement(Interval(version, True, version, True))
+    if operator == "~=":
+        prefix = Version(f"{version.epoch}!{_join(version.release[:-1])}")
+        return _intersection(
+            [Interval(lower=version, lower_inclusive=True)], [_prefix_interval(prefix)]
+        )
+
+    return None
+
+
+def _prefix_interval(prefix: Version) -> Interval:
+    """Return the interval of all versions starting with a release prefix."""
+    release = prefix.release
+    upper_release = (*release[:-1], release[-1] + 1)
+    return Interval(
+        lower=Version(f"{prefix.epoch}!{_join(release)}.dev0"),
+        lower_inclusive=True,
+        upper=Version(f"{prefix.epoch}!{_join(upper_release)}.dev0"),
+    )
+
+
+def _complement(interval: Interval) -> List[Interval]:
+    """Return the complement of a bounded interval."""
+    return [
+        Interval(upper=interval.lower, upper_inclusive=not interval.lower_inclusive),
+        Interval(lower=interval.upper, lower_inclusive=not interval.upper_inclusive),
+    ]
+
+
+def _intersection(first: List[Interval], second: List[Interval]) -> List[Interval]:
+    """Return the intersection of two lists of sorted, disjoint intervals."""
+    result = []
+    for a in first:
+        for b in second:
+            interval = a.intersection(b)
+            if not interval.is_empty():
+                result.append(interval)
+    result.sort(key=_lower_key)
+    return result
+
+
+def _lower_index(versions: Sequence[Version], interval: Interval) -> int:
+    """Return the index of the first version not below the interval."""
+    if interval.lower is None:
+        return 0
+    if interval.lower_inclusive:
+        return bisect_left(versions, interval.lower)
+
+    i = bisect_right(versions, interval.lower)
+    while i < len(versions) and _is_local_of(versions[i], interval.lower):
+        i += 1
+    return i
+
+
+def _upper_index(versions: Sequence[Version], interval: Interval) -> int:
+    """Return the index after the last version not above the interval."""
+    if interval.upper is None:
+        return len(versions)
+    if not interval.upper_inclusive:
+        return bisect_left(versions, interval.upper)
+
+    i = bisect_right(versions, interval.upper)
+    while i < len(versions) and _is_local_of(versions[i], interval.upper):
+        i += 1
+    return i
+
+
+def _is_local_of(version: Version, public: Version) -> bool:
+    return version.local is not None and Version(version.public) == public
+
+
+def _base_key(version: Version) -> Tuple[int, Tuple[int, ...]]:
+    """Return a key identifying the base version of a version."""
+    release = version.release
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    return version.epoch, release
+
+
+def _join(release: Tuple[int, ...]) -> str:
+    return ".".join(str(part) for part in release)
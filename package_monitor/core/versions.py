@@ -0,0 +1,104 @@
+"""Parse version, specifier and requirement strings with a process-wide cache."""
+
+from functools import lru_cache
+from typing import Optional
+
+from packaging.markers import Marker, UndefinedComparison, UndefinedEnvironmentName
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+VERSION_CACHE_SIZE = 65536
+"""Maximum number of parsed versions kept in the cache."""
+
+SPECIFIER_CACHE_SIZE = 4096
+"""Maximum number of parsed specifiers kept in the cache."""
+
+REQUIREMENT_CACHE_SIZE = 16384
+"""Maximum number of parsed requirements kept in the cache."""
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def parse_version(version_string: str) -> Version:
+    """Parse a version string and return it as Version.
+
+    Parsed versions are cached and shared, so each distinct string is parsed once.
+
+    Raises InvalidVersion if the string is not a valid version.
+    """
+    return Version(version_string)
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def to_version_or_none(version_string: str) -> Optional[Version]:
+    """Convert a version string to a Version object or return None if not possible.
+
+    Only normalized version strings are converted.
+    """
+    try:
+        version = parse_version(version_string)
+    except InvalidVersion:
+        return None
+
+    if str(version) != str(version_string):
+        return None
+
+    return version
+
+
+@lru_cache(maxsize=SPECIFIER_CACHE_SIZE)
+def parse_specifier_set(specifiers: str) -> SpecifierSet:
+    """Parse a specifiers string and return it as SpecifierSet.
+
+    Parsed specifiers are cached and shared, so they must not be modified.
+
+    Raises InvalidSpecifier if the string is not a valid specifier.
+    """
+    return SpecifierSet(specifiers)
+
+
+@lru_cache(maxsize=SPECIFIER_CACHE_SIZE)
+def is_python_supported(requires_python: str, python_version: Version) -> bool:
+    """Return True if a Python version matches a requires_python string.
+
+    Results are cached, since only few distinct strings are used by releases.
+
+    Raises InvalidSpecifier if the string is not a valid specifier.
+    """
+    return python_version in parse_specifier_set(requires_python)
+
+
+@lru_cache(maxsize=REQUIREMENT_CACHE_SIZE)
+def parse_requirement(requirement: str) -> Requirement:
+    """Parse a requirement string and return it as Requirement.
+
+    Parsed requirements are cached and shared, so they must not be modified.
+
+    Raises InvalidRequirement if the string is not a valid requirement.
+    """
+    return Requirement(requirement)
+
+
+@lru_cache(maxsize=REQUIREMENT_CACHE_SIZE)
+def is_marker_true(marker: str) -> bool:
+    """Return True if a marker string evaluates to true for the current environment.
+
+    Results are cached, since the environment does not change within a process.
+    Markers which can not be evaluated are reported as False.
+
+    Raises InvalidMarker if the string is not a valid marker.
+    """
+    try:
+        return Marker(marker).evaluate()
+    except (UndefinedEnvironmentName, UndefinedComparison):
+        return False
+
+
+def clear_cache() -> None:
+    """Clear the caches of parsed versions, specifiers and requirements."""
+    parse_version.cache_clear()
+    to_version_or_none.cache_clear()
+    parse_specifier_set.cache_clear()
+    is_python_supported.cache_clear()
+    parse_requirement.cache_clear()
+    is_marker_true.cache_clear()
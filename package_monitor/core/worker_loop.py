@@ -0,0 +1,179 @@
+"""Event loops for refreshes and the long-lived HTTP session of a worker process."""
+
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, Coroutine, Optional, Tuple
+
+import aiohttp
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from package_monitor import __title__
+from package_monitor.app_settings import PACKAGE_MONITOR_UVLOOP_ENABLED
+
+from .pypi import create_session
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+CLOSE_TIMEOUT = 10
+"""Maximum time in seconds to wait for the session to close."""
+
+
+class WorkerLoop:
+    """An event loop running in its own thread, which is shared by all refreshes
+    of a worker process.
+
+    It also provides a shared HTTP session, so connections and resolved hosts
+    can be reused between refreshes.
+
+    The loop is started when first needed and started again
+    in a child process after a fork.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_limits: Optional[Tuple[int, int]] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Return True when the loop is running in this process."""
+        return (
+            self._loop is not None
+            and self._pid == os.getpid()
+            and self._thread is not None
+            and self._thread.is_alive()
+        )
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the loop, wait for it to complete and return its result.
+
+        Must not be called from the loop itself.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result()
+
+    async def session(
+        self, max_concurrency: int = 0, max_concurrency_per_host: int = 0
+    ) -> aiohttp.ClientSession:
+        """Return the shared session.
+
+        The session is created again when the concurrency limits have changed.
+
+        Must be called from the loop.
+        """
+        limits = (max_concurrency, max_concurrency_per_host)
+        if self._session and not self._session.closed:
+            if self._session_limits == limits:
+                return self._session
+            await self._session.close()
+
+        self._session = create_session(
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+        )
+        self._session_limits = limits
+        return self._session
+
+    def close(self) -> None:
+        """Close the shared session and stop the loop."""
+        with self._lock:
+            if not self.is_running:
+                return
+
+            loop = self._loop
+            if self._session:
+                future = asyncio.run_coroutine_threadsafe(self._session.close(), loop)
+                try:
+                    future.result(timeout=CLOSE_TIMEOUT)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.warning("Failed to close shared session", exc_info=True)
+
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=CLOSE_TIMEOUT)
+            if not self._thread.is_alive():
+                loop.close()
+            self._reset()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if not self.is_running:
+                # a loop inherited from a parent process can not be used
+                self._reset()
+                self._loop = new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="package-monitor-loop",
+                    daemon=True,
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+                logger.debug("Started worker loop in process %d", self._pid)
+
+            return self._loop
+
+    def _reset(self) -> None:
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._session = None
+        self._session_limits = None
+
+
+worker_loop = WorkerLoop()
+"""Event loop shared by all refreshes of this process."""
+
+atexit.register(worker_loop.close)
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create and return a new event loop for refreshes.
+
+    This is an uvloop event loop when enabled and installed,
+    else the default event loop.
+    """
+    if PACKAGE_MONITOR_UVLOOP_ENABLED:
+        if uvloop:
+            return uvloop.new_event_loop()
+        logger.warning("uvloop is enabled, but not installed. Using default loop.")
+
+    return asyncio.new_event_loop()
+
+
+def run_in_new_loop(coro: Coroutine) -> Any:
+    """Run a coroutine in a new event loop and return its result.
+
+    Like asyncio.run(), but with an event loop from new_event_loop().
+    """
+    loop = new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            _cancel_remaining_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+
+def _cancel_remaining_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return
+
+    for task in tasks:
+        task.cancel()
+
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
@@ -9,6 +9,18 @@ from package_monitor.models import Distribution
 class Command(BaseCommand):
     help = "Refreshes all data about distribution packages"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-concurrency",
+            type=int,
+            help="Maximum number of concurrent requests to package indexes",
+        )
+        parser.add_argument(
+            "--max-concurrency-per-host",
+            type=int,
+            help="Maximum number of concurrent requests to the same host",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(f"*** {__title__} v{__version__} - Refresh Distributions ***")
         package_count = Distribution.objects.count()
@@ -18,7 +30,10 @@ class Command(BaseCommand):
             f"With {outdated_count} package(s) currently showing as outdated."
         )
         self.stdout.write("This can take a minute...Please wait")
-        package_count = Distribution.objects.update_all()
+        package_count = Distribution.objects.update_all(
+            max_concurrency=options["max_concurrency"],
+            max_concurrency_per_host=options["max_concurrency_per_host"],
+        )
         outdated_count = Distribution.objects.filter_visible().outdated_count()
         self.stdout.write(
             self.style.SUCCESS(
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List, Set
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
 
-from packaging.version import parse as version_parse
+from packaging.utils import canonicalize_name
 
+from django.apps import apps
 from django.db import models
 
 from allianceauth.services.hooks import get_extension_logger
@@ -25,9 +26,11 @@ from .core.distribution_packages import (
     gather_distribution_packages,
     update_packages_from_pypi,
 )
+from .core.pypi import ReleaseStore
+from .core.versions import parse_version
 
 if TYPE_CHECKING:
-    from .models import Distribution
+    from .models import Distribution, ReleaseMetadata
 
 TERMINAL_MAX_LINE_LENGTH = 4095
 
@@ -73,14 +76,33 @@ class DistributionQuerySet(models.QuerySet):
 class DistributionManagerBase(models.Manager):
     """Manager for Distribution."""
 
-    def update_all(self) -> int:
-        """Update the list of relevant distribution packages in the database."""
+    def update_all(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_host: Optional[int] = None,
+    ) -> int:
+        """Update the list of relevant distribution packages in the database.
+
+        Concurrency limits default to the respective settings.
+        """
         logger.info(
             f"Started refreshing approx. {self.count()} distribution packages..."
         )
         packages = gather_distribution_packages()
         requirements = compile_package_requirements(packages)
-        update_packages_from_pypi(packages, requirements)
+        # the database is only accessed from this thread
+        release_metadata = apps.get_model("package_monitor", "ReleaseMetadata")
+        releases = ReleaseStore(
+            known=release_metadata.objects.packages_releases_data(packages.keys())
+        )
+        update_packages_from_pypi(
+            packages,
+            requirements,
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+            releases=releases,
+        )
+        release_metadata.objects.store_packages_releases_data(releases.new)
         self._save_packages(packages=packages, requirements=requirements)
         packages_count = len(packages)
         logger.info(f"Completed refreshing {packages_count} distribution packages")
@@ -149,12 +171,12 @@ class DistributionManagerBase(models.Manager):
                 continue
             if not dist.installed_version or not dist.latest_version:
                 continue
-            installed = version_parse(dist.installed_version)
-            latest = version_parse(dist.latest_version)
+            installed = parse_version(dist.installed_version)
+            latest = parse_version(dist.latest_version)
             if latest <= installed:
                 continue
             if not should_repeat and dist.latest_notified_version:
-                notified = version_parse(dist.latest_notified_version)
+                notified = parse_version(dist.latest_notified_version)
                 if notified >= latest:
                     continue
             selected.append(dist)
@@ -179,3 +201,60 @@ class DistributionManagerBase(models.Manager):
 
 
 DistributionManager = DistributionManagerBase.from_queryset(DistributionQuerySet)
+
+
+class ReleaseMetadataManager(models.Manager):
+    """Manager for ReleaseMetadata."""
+
+    def releases_data(self, name: str, versions: List[str]) -> Dict[str, dict]:
+        """Return stored releases of a package by version
+        in the format of the PyPI JSON API.
+        """
+        qs = self.filter(name=canonicalize_name(name), version__in=versions)
+        return {obj.version: obj.to_release_data() for obj in qs}
+
+    def packages_releases_data(
+        self, names: Iterable[str]
+    ) -> Dict[str, Dict[str, dict]]:
+        """Return all stored releases of packages by canonical name and version
+        in the format of the PyPI JSON API.
+        """
+        result: Dict[str, Dict[str, dict]] = {}
+        qs = self.filter(name__in={canonicalize_name(name) for name in names})
+        for obj in qs:
+            result.setdefault(obj.name, {})[obj.version] = obj.to_release_data()
+        return result
+
+    def store_releases_data(self, name: str, releases: Dict[str, dict]) -> None:
+        """Store releases of a package given by version
+        in the format of the PyPI JSON API.
+
+        Already stored releases are not changed.
+        """
+        self.store_packages_releases_data({name: releases})
+
+    def store_packages_releases_data(
+        self, packages_releases: Dict[str, Dict[str, dict]]
+    ) -> None:
+        """Store releases of packages given by name and version
+        in the format of the PyPI JSON API.
+
+        Already stored releases are not changed.
+        """
+        max_length = self.model._meta.get_field("version").max_length
+        objs: List[ReleaseMetadata] = []
+        for name, releases in packages_releases.items():
+            for version, release in releases.items():
+                if len(version) > max_length:
+                    continue  # can not be stored
+                info = release["info"]
+                objs.append(
+                    self.model(
+                        name=canonicalize_name(name),
+                        version=version,
+                        requires_dist=info.get("requires_dist") or [],
+                        requires_python=info.get("requires_python") or "",
+                        is_yanked=bool(info.get("yanked")),
+                    )
+                )
+        self.bulk_create(objs, ignore_conflicts=True)
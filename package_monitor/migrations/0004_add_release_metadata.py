@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("package_monitor", "0003_add_update_notifications"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReleaseMetadata",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Normalized name of the package", max_length=255
+                    ),
+                ),
+                (
+                    "version",
+                    models.CharField(
+                        help_text="Version of this release", max_length=64
+                    ),
+                ),
+                (
+                    "requires_dist",
+                    models.JSONField(
+                        default=list, help_text="Requirements of this release"
+                    ),
+                ),
+                (
+                    "requires_python",
+                    models.TextField(
+                        default="",
+                        help_text="Python versions supported by this release",
+                    ),
+                ),
+                (
+                    "is_yanked",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether this release was yanked at the time it was fetched",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="releasemetadata",
+            constraint=models.UniqueConstraint(
+                fields=("name", "version"), name="functional_pk_releasemetadata"
+            ),
+        ),
+    ]
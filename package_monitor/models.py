@@ -2,7 +2,7 @@
 
 from django.db import models
 
-from .managers import DistributionManager
+from .managers import DistributionManager, ReleaseMetadataManager
 
 MAX_LENGTH_VERSION_STRING = 64
 
@@ -86,3 +86,50 @@ class Distribution(models.Model):
         return (
             f"{self.name}=={self.latest_version}" if self.latest_version else self.name
         )
+
+
+class ReleaseMetadata(models.Model):
+    """Metadata of a published release of a distribution package.
+
+    Metadata of a published release does not change,
+    so it is stored permanently to avoid fetching it again.
+    """
+
+    name = models.CharField(max_length=255, help_text="Normalized name of the package")
+    version = models.CharField(
+        max_length=MAX_LENGTH_VERSION_STRING, help_text="Version of this release"
+    )
+    requires_dist = models.JSONField(
+        default=list, help_text="Requirements of this release"
+    )
+    requires_python = models.TextField(
+        default="", help_text="Python versions supported by this release"
+    )
+    is_yanked = models.BooleanField(
+        default=False,
+        help_text="Whether this release was yanked at the time it was fetched",
+    )
+
+    objects = ReleaseMetadataManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "version"], name="functional_pk_releasemetadata"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} {self.version}"
+
+    def to_release_data(self) -> dict:
+        """Return this release in the format of the PyPI JSON API."""
+        return {
+            "info": {
+                "name": self.name,
+                "version": self.version,
+                "requires_dist": self.requires_dist,
+                "requires_python": self.requires_python,
+                "yanked": self.is_yanked,
+            }
+        }
@@ -1,3 +1,4 @@
+import asyncio
 from collections import namedtuple
 from unittest import IsolatedAsyncioTestCase, mock
 
@@ -5,18 +6,23 @@ from packaging.requirements import Requirement
 from packaging.specifiers import SpecifierSet
 from packaging.version import Version
 
+from django.test import TestCase
+
 from app_utils.testing import NoSocketsTestCase
 
 from package_monitor.core.distribution_packages import (
     DistributionPackage,
+    _ReleasesNotFetched,
     compile_package_requirements,
     determine_system_python_version,
     gather_distribution_packages,
     gather_protected_packages_versions,
     is_marker_valid,
     is_version_in_specifiers,
-    to_version_or_none,
+    update_packages_from_pypi,
 )
+from package_monitor.core.pypi import PYPI_INDEX, PackageIndex
+from package_monitor.core.worker_loop import worker_loop
 from package_monitor.tests.factories import (
     DistributionPackageFactory,
     MetadataDistributionStubFactory,
@@ -26,6 +32,7 @@ from package_monitor.tests.factories import (
 )
 
 MODULE_PATH = "package_monitor.core.distribution_packages"
+MODULE_PATH_INDEXES = "package_monitor.core.package_indexes"
 
 
 SysVersionInfo = namedtuple("SysVersionInfo", ["major", "minor", "micro"])
@@ -92,6 +99,26 @@ class TestDistributionPackage(NoSocketsTestCase):
         # when/then
         self.assertFalse(obj.is_prerelease())
 
+    def test_should_detect_not_as_prerelease_when_not_normalized(self):
+        # given
+        obj = DistributionPackageFactory(current="1.0.0alpha1")
+        # when/then
+        self.assertFalse(obj.is_prerelease())
+
+    def test_should_return_versions(self):
+        # given
+        obj = DistributionPackageFactory(current="1.0.0", latest="1.1.0")
+        # when/then
+        self.assertEqual(obj.current_version, Version("1.0.0"))
+        self.assertEqual(obj.latest_version, Version("1.1.0"))
+
+    def test_should_return_no_versions_when_unknown(self):
+        # given
+        obj = DistributionPackageFactory(current="", latest="")
+        # when/then
+        self.assertIsNone(obj.current_version)
+        self.assertIsNone(obj.latest_version)
+
 
 class MyDist:
     @property
@@ -230,7 +257,8 @@ class TestCompilePackageRequirements(NoSocketsTestCase):
         self.assertDictEqual(expected, result)
 
 
-@mock.patch(MODULE_PATH + ".fetch_project_from_pypi_async")
+@mock.patch(MODULE_PATH_INDEXES + ".package_indexes", new=lambda: [PYPI_INDEX])
+@mock.patch(MODULE_PATH_INDEXES + ".fetch_project_from_index_async")
 class TestUpdatePackagesFromPyPi(IsolatedAsyncioTestCase):
     def setUp(self) -> None:
         self.python_version = determine_system_python_version()
@@ -561,6 +589,317 @@ class TestUpdatePackagesFromPyPi(IsolatedAsyncioTestCase):
         # then
         self.assertEqual(dist_alpha.latest, "1.2.0")
 
+    @mock.patch(MODULE_PATH + ".fetch_pypi_releases")
+    async def test_should_include_releases_from_secondary_index(
+        self, mock_fetch_pypi_releases, mock_fetch_data_from_pypi_async
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        pypi_alpha = PypiFactory(distribution=dist_alpha)
+        pypi_alpha.info.version = "1.1.0"
+        pypi_alpha.releases["1.1.0"] = [PypiReleaseFactory()]
+        pypi_alpha_1 = PypiFactory(distribution=dist_alpha)
+        pypi_alpha_1.info.version = "1.1.0"
+        secondary_alpha = PypiFactory(distribution=dist_alpha)
+        secondary_alpha.releases = {"1.2.0": [PypiReleaseFactory()]}
+        secondary_index = PackageIndex(
+            name="Secondary", url="https://pypi.example.com", release_data=False
+        )
+        projects = {
+            PYPI_INDEX: pypi_alpha.asdict(),
+            secondary_index: secondary_alpha.asdict(),
+        }
+        mock_fetch_data_from_pypi_async.side_effect = (
+            lambda session, index, name: projects[index]
+        )
+        mock_fetch_pypi_releases.return_value = [pypi_alpha_1.asdict()]
+
+        # when
+        await dist_alpha.update_from_pypi_async(
+            session=mock.MagicMock(),
+            requirements={},
+            protected_packages_versions={"bravo": Version("0.5.0")},
+            system_python=self.python_version,
+            indexes=[PYPI_INDEX, secondary_index],
+        )
+
+        # then
+        self.assertEqual(dist_alpha.latest, "1.2.0")
+        self.assertEqual(mock_fetch_data_from_pypi_async.await_count, 2)
+
+    @mock.patch(MODULE_PATH + ".fetch_pypi_releases")
+    async def test_should_not_update_package_when_releases_can_not_be_fetched(
+        self, mock_fetch_pypi_releases, mock_fetch_data_from_pypi_async
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        pypi_alpha = PypiFactory(distribution=dist_alpha)
+        pypi_alpha.info.version = "1.1.0"
+        pypi_alpha.releases["1.1.0"] = [PypiReleaseFactory()]
+        mock_fetch_data_from_pypi_async.return_value = pypi_alpha.asdict()
+        mock_fetch_pypi_releases.return_value = [None]
+
+        # when
+        result = await dist_alpha.update_from_pypi_async(
+            session=mock.MagicMock(),
+            requirements={},
+            protected_packages_versions={"bravo": Version("0.5.0")},
+            system_python=self.python_version,
+        )
+
+        # then
+        self.assertFalse(result)
+        self.assertEqual(dist_alpha.latest, "")
+        self.assertIsNone(dist_alpha.is_outdated())
+
+
+class TestUpdatePackagesFromPypiSync(TestCase):
+    def tearDown(self) -> None:
+        worker_loop.close()
+
+    def test_should_update_other_packages_when_one_fails(self):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        dist_bravo = DistributionPackageFactory(name="bravo", current="1.0.0")
+        packages = {"alpha": dist_alpha, "bravo": dist_bravo}
+        mock_update_bravo = mock.AsyncMock(return_value=True)
+        # when
+        with mock.patch.object(
+            dist_alpha, "update_from_pypi_async", side_effect=RuntimeError
+        ), mock.patch.object(dist_bravo, "update_from_pypi_async", mock_update_bravo):
+            update_packages_from_pypi(packages, requirements={})
+        # then
+        mock_update_bravo.assert_awaited_once()
+
+    def test_should_keep_packages_updated_before_timeout(self):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        dist_bravo = DistributionPackageFactory(name="bravo", current="1.0.0")
+        packages = {"alpha": dist_alpha, "bravo": dist_bravo}
+
+        async def update_alpha(**kwargs):
+            await asyncio.sleep(10)
+            dist_alpha.latest = "1.1.0"
+            return True
+
+        async def update_bravo(**kwargs):
+            dist_bravo.latest = "1.1.0"
+            return True
+
+        # when
+        with mock.patch.object(
+            dist_alpha, "update_from_pypi_async", side_effect=update_alpha
+        ), mock.patch.object(
+            dist_bravo, "update_from_pypi_async", side_effect=update_bravo
+        ):
+            update_packages_from_pypi(packages, requirements={}, timeout=0.1)
+        # then
+        self.assertEqual(dist_alpha.latest, "")
+        self.assertIsNone(dist_alpha.is_outdated())
+        self.assertEqual(dist_bravo.latest, "1.1.0")
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_REFRESH_TIMEOUT", 0)
+    def test_should_not_time_out_when_disabled(self):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        packages = {"alpha": dist_alpha}
+
+        async def update_alpha(**kwargs):
+            await asyncio.sleep(0.1)
+            dist_alpha.latest = "1.1.0"
+            return True
+
+        # when
+        with mock.patch.object(
+            dist_alpha, "update_from_pypi_async", side_effect=update_alpha
+        ):
+            update_packages_from_pypi(packages, requirements={})
+        # then
+        self.assertEqual(dist_alpha.latest, "1.1.0")
+
+    def test_should_update_no_packages(self):
+        # when
+        with mock.patch(MODULE_PATH + ".logger") as mock_logger:
+            update_packages_from_pypi({}, requirements={})
+        # then
+        self.assertFalse(mock_logger.warning.called)
+
+    def test_should_reuse_session_between_refreshes(self):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        packages = {"alpha": dist_alpha}
+        mock_update = mock.AsyncMock(return_value=True)
+        # when
+        with mock.patch.object(dist_alpha, "update_from_pypi_async", mock_update):
+            update_packages_from_pypi(packages, requirements={})
+            update_packages_from_pypi(packages, requirements={})
+        # then
+        session_1 = mock_update.await_args_list[0].kwargs["session"]
+        session_2 = mock_update.await_args_list[1].kwargs["session"]
+        self.assertIs(session_1, session_2)
+        self.assertFalse(session_1.closed)
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_SHARED_SESSION_ENABLED", False)
+    def test_should_use_new_session_for_each_refresh_when_disabled(self):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        packages = {"alpha": dist_alpha}
+        mock_update = mock.AsyncMock(return_value=True)
+        # when
+        with mock.patch.object(dist_alpha, "update_from_pypi_async", mock_update):
+            update_packages_from_pypi(packages, requirements={})
+            update_packages_from_pypi(packages, requirements={})
+        # then
+        session_1 = mock_update.await_args_list[0].kwargs["session"]
+        session_2 = mock_update.await_args_list[1].kwargs["session"]
+        self.assertIsNot(session_1, session_2)
+        self.assertTrue(session_1.closed)
+
+
+@mock.patch(MODULE_PATH + ".fetch_pypi_releases")
+class TestDetermineLatestAvailableUpdate(IsolatedAsyncioTestCase):
+    @staticmethod
+    def _make_releases(dist, invalid_versions=None):
+        invalid_versions = invalid_versions or set()
+
+        async def fetch_pypi_releases(
+            session, name, releases, metadata_urls=None, release_indexes=None
+        ):
+            result = []
+            for version in releases:
+                pypi = PypiFactory(distribution=dist)
+                pypi.info.version = str(version)
+                if str(version) in invalid_versions:
+                    pypi.info.requires_dist = ["bravo>=1.0.0"]
+                result.append(pypi.asdict())
+            return result
+
+        return fetch_pypi_releases
+
+    async def test_should_only_fetch_newest_releases(self, mock_fetch_pypi_releases):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        mock_fetch_pypi_releases.side_effect = self._make_releases(dist_alpha)
+        updates = [Version(f"1.{minor}.0") for minor in range(1, 11)]
+        # when
+        result = await dist_alpha._determine_latest_available_update(
+            session=mock.MagicMock(),
+            updates=updates,
+            protected_packages_versions={"bravo": Version("0.5.0")},
+        )
+        # then
+        self.assertEqual(result, Version("1.10.0"))
+        self.assertEqual(mock_fetch_pypi_releases.call_count, 1)
+        _, kwargs = mock_fetch_pypi_releases.call_args
+        self.assertListEqual(
+            kwargs["releases"],
+            [Version("1.10.0"), Version("1.9.0"), Version("1.8.0"), Version("1.7.0")],
+        )
+
+    async def test_should_continue_with_older_releases_when_newest_are_invalid(
+        self, mock_fetch_pypi_releases
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        mock_fetch_pypi_releases.side_effect = self._make_releases(
+            dist_alpha, invalid_versions={"1.10.0", "1.9.0", "1.8.0", "1.7.0", "1.6.0"}
+        )
+        updates = [Version(f"1.{minor}.0") for minor in range(1, 11)]
+        # when
+        result = await dist_alpha._determine_latest_available_update(
+            session=mock.MagicMock(),
+            updates=updates,
+            protected_packages_versions={"bravo": Version("0.5.0")},
+        )
+        # then
+        self.assertEqual(result, Version("1.5.0"))
+        self.assertEqual(mock_fetch_pypi_releases.call_count, 2)
+
+    async def test_should_return_none_when_no_valid_release(
+        self, mock_fetch_pypi_releases
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        mock_fetch_pypi_releases.side_effect = self._make_releases(
+            dist_alpha, invalid_versions={"1.1.0", "1.2.0"}
+        )
+        updates = [Version("1.1.0"), Version("1.2.0")]
+        # when
+        result = await dist_alpha._determine_latest_available_update(
+            session=mock.MagicMock(),
+            updates=updates,
+            protected_packages_versions={"bravo": Version("0.5.0")},
+        )
+        # then
+        self.assertIsNone(result)
+
+    async def test_should_raise_error_when_newer_releases_can_not_be_fetched(
+        self, mock_fetch_pypi_releases
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        fetch = self._make_releases(dist_alpha)
+
+        async def fetch_without_newest(session, name, releases, **kwargs):
+            result = await fetch(session, name, releases, **kwargs)
+            return [None] + result[1:]
+
+        mock_fetch_pypi_releases.side_effect = fetch_without_newest
+        updates = [Version("1.1.0"), Version("1.2.0")]
+        # when/then
+        with self.assertRaises(_ReleasesNotFetched):
+            await dist_alpha._determine_latest_available_update(
+                session=mock.MagicMock(),
+                updates=updates,
+                protected_packages_versions={"bravo": Version("0.5.0")},
+            )
+
+    async def test_should_ignore_older_releases_which_can_not_be_fetched(
+        self, mock_fetch_pypi_releases
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        fetch = self._make_releases(dist_alpha)
+
+        async def fetch_without_oldest(session, name, releases, **kwargs):
+            result = await fetch(session, name, releases, **kwargs)
+            return result[:-1] + [None]
+
+        mock_fetch_pypi_releases.side_effect = fetch_without_oldest
+        updates = [Version("1.1.0"), Version("1.2.0")]
+        # when
+        result = await dist_alpha._determine_latest_available_update(
+            session=mock.MagicMock(),
+            updates=updates,
+            protected_packages_versions={"bravo": Version("0.5.0")},
+        )
+        # then
+        self.assertEqual(result, Version("1.2.0"))
+
+    async def test_should_not_fetch_releases_from_index_without_release_data(
+        self, mock_fetch_pypi_releases
+    ):
+        # given
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        mock_fetch_pypi_releases.side_effect = self._make_releases(dist_alpha)
+        updates = [Version("1.1.0"), Version("1.2.0")]
+        # when
+        result = await dist_alpha._determine_latest_available_update(
+            session=mock.MagicMock(),
+            updates=updates,
+            protected_packages_versions={"bravo": Version("0.5.0")},
+            release_indexes={
+                "1.1.0": PYPI_INDEX,
+                "1.2.0": PackageIndex(
+                    name="Secondary", url="https://pypi.example.com", release_data=False
+                ),
+            },
+        )
+        # then
+        self.assertEqual(result, Version("1.2.0"))
+        _, kwargs = mock_fetch_pypi_releases.call_args
+        self.assertListEqual(kwargs["releases"], [Version("1.1.0")])
+
 
 class TestGatherProtectedPackagesVersions(NoSocketsTestCase):
     def test_should_return_protected_packages_with_versions(self):
@@ -628,18 +967,6 @@ class TestIsRequirementValid(NoSocketsTestCase):
                 self.assertIs(is_marker_valid(r), expected)
 
 
-class TestToVersionOrNone(NoSocketsTestCase):
-    def test_should_report_correctly(self):
-        cases = [
-            ("1.0.0", Version("1.0.0")),
-            ("invalid", None),
-            ("1.0.0alpha1", None),
-        ]
-        for s, expected in cases:
-            with self.subTest(case=s):
-                self.assertEqual(to_version_or_none(s), expected)
-
-
 class TestIsVersionInSpecifiers(NoSocketsTestCase):
     def test_should_report_correctly(self):
         cases = [
@@ -0,0 +1,264 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+import aiohttp
+from aioresponses import aioresponses
+
+from app_utils.testing import NoSocketsTestCase
+
+from package_monitor.core.package_indexes import (
+    fetch_project_from_indexes_async,
+    index_host_limits,
+    merge_projects,
+    package_indexes,
+)
+from package_monitor.core.pypi import PackageIndex, clear_cache, refresh_scope
+
+MODULE_PATH = "package_monitor.core.package_indexes"
+
+PRIMARY = PackageIndex(name="Primary", url="https://primary.example.com/pypi")
+SECONDARY = PackageIndex(name="Secondary", url="https://secondary.example.com")
+
+
+class TestPackageIndexes(NoSocketsTestCase):
+    def test_should_return_indexes_in_order_of_preference(self):
+        # given
+        config = [
+            {"name": "Mirror", "url": "https://mirror.example.com"},
+            {"name": "PyPI", "url": "https://pypi.org/pypi", "priority": -1},
+            {"name": "Private", "url": "https://private.example.com"},
+        ]
+        # when
+        with mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_PACKAGE_INDEXES", config):
+            result = package_indexes()
+        # then
+        self.assertListEqual(
+            [index.name for index in result], ["Mirror", "Private", "PyPI"]
+        )
+
+    def test_should_ignore_invalid_indexes(self):
+        # given
+        config = [
+            {"name": "Mirror", "url": "https://mirror.example.com"},
+            {"name": "Invalid", "invalid": True},
+        ]
+        # when
+        with mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_PACKAGE_INDEXES", config):
+            result = package_indexes()
+        # then
+        self.assertListEqual([index.name for index in result], ["Mirror"])
+
+    def test_should_return_default_indexes(self):
+        # when
+        result = package_indexes()
+        # then
+        self.assertListEqual(
+            [index.name for index in result], ["PyPI", "EVE University"]
+        )
+
+
+class TestIndexHostLimits(NoSocketsTestCase):
+    def test_should_return_limits_by_host(self):
+        # given
+        indexes = [
+            PackageIndex(
+                name="PyPI",
+                url="https://pypi.org/pypi",
+                simple_url="https://pypi.org/simple",
+                max_concurrency=5,
+            ),
+            PackageIndex(name="Mirror", url="https://mirror.example.com"),
+        ]
+        # when
+        result = index_host_limits(indexes)
+        # then
+        self.assertDictEqual(result, {"pypi.org": 5})
+
+    def test_should_use_lowest_limit_for_shared_host(self):
+        # given
+        indexes = [
+            PackageIndex(
+                name="Mirror",
+                url="https://devpi.example.com/root/pypi",
+                max_concurrency=5,
+            ),
+            PackageIndex(
+                name="Private",
+                url="https://devpi.example.com/private/dev",
+                max_concurrency=2,
+            ),
+            PackageIndex(name="Other", url="https://devpi.example.com/other/dev"),
+        ]
+        # when
+        result_1 = index_host_limits(indexes)
+        result_2 = index_host_limits(indexes[::-1])
+        # then
+        self.assertDictEqual(result_1, {"devpi.example.com": 2})
+        self.assertDictEqual(result_2, {"devpi.example.com": 2})
+
+
+class TestMergeProjects(NoSocketsTestCase):
+    def test_should_merge_releases(self):
+        # given
+        primary = {"info": {"name": "alpha"}, "releases": {"1.0.0": [], "1.1.0": []}}
+        secondary = {"info": {"name": "Alpha"}, "releases": {"1.2.0": []}}
+        # when
+        result = merge_projects([(PRIMARY, primary), (SECONDARY, secondary)])
+        # then
+        self.assertEqual(result.data["info"], {"name": "alpha"})
+        self.assertSetEqual(set(result.data["releases"]), {"1.0.0", "1.1.0", "1.2.0"})
+        self.assertDictEqual(
+            result.release_indexes,
+            {"1.0.0": PRIMARY, "1.1.0": PRIMARY, "1.2.0": SECONDARY},
+        )
+
+    def test_should_prefer_releases_from_preferred_index(self):
+        # given
+        primary = {"info": {}, "releases": {"1.0.0": [{"filename": "primary"}]}}
+        secondary = {"info": {}, "releases": {"1.0.0": [{"filename": "secondary"}]}}
+        # when
+        result = merge_projects([(PRIMARY, primary), (SECONDARY, secondary)])
+        # then
+        self.assertEqual(result.data["releases"]["1.0.0"], [{"filename": "primary"}])
+        self.assertEqual(result.release_indexes["1.0.0"], PRIMARY)
+
+    def test_should_not_change_given_projects(self):
+        # given
+        primary = {"info": {"name": "alpha"}, "releases": {"1.0.0": []}}
+        secondary = {"info": {"name": "alpha"}, "releases": {"1.2.0": []}}
+        # when
+        merge_projects([(PRIMARY, primary), (SECONDARY, secondary)])
+        # then
+        self.assertSetEqual(set(primary["releases"]), {"1.0.0"})
+
+    def test_should_return_none_when_no_projects(self):
+        self.assertIsNone(merge_projects([]))
+
+
+@mock.patch(MODULE_PATH + ".fetch_project_from_index_async")
+class TestFetchProjectFromIndexes(IsolatedAsyncioTestCase):
+    async def test_should_merge_projects_from_all_indexes(self, mock_fetch):
+        # given
+        projects = {
+            PRIMARY: {"info": {}, "releases": {"1.0.0": []}},
+            SECONDARY: {"info": {}, "releases": {"1.1.0": []}},
+        }
+        mock_fetch.side_effect = lambda session, index, name: projects[index]
+        # when
+        result = await fetch_project_from_indexes_async(
+            mock.MagicMock(), "alpha", indexes=[PRIMARY, SECONDARY]
+        )
+        # then
+        self.assertSetEqual(set(result.data["releases"]), {"1.0.0", "1.1.0"})
+
+    async def test_should_use_first_index_having_project(self, mock_fetch):
+        # given
+        projects = {
+            PRIMARY: None,
+            SECONDARY: {"info": {}, "releases": {"1.1.0": []}},
+        }
+        mock_fetch.side_effect = lambda session, index, name: projects[index]
+        # when
+        result = await fetch_project_from_indexes_async(
+            mock.MagicMock(),
+            "alpha",
+            indexes=[PRIMARY, SECONDARY],
+            merge_policy="first",
+        )
+        # then
+        self.assertSetEqual(set(result.data["releases"]), {"1.1.0"})
+
+    async def test_should_skip_slower_indexes_after_authoritative_answer(
+        self, mock_fetch
+    ):
+        # given
+        authoritative = PackageIndex(
+            name="Private", url="https://private.example.com", authoritative=True
+        )
+        never_answers = asyncio.Event()
+
+        async def fetch(session, index, name):
+            if index == authoritative:
+                return {"info": {}, "releases": {"1.0.0": []}}
+            await never_answers.wait()
+
+        mock_fetch.side_effect = fetch
+        # when
+        result = await asyncio.wait_for(
+            fetch_project_from_indexes_async(
+                mock.MagicMock(), "alpha", indexes=[authoritative, SECONDARY]
+            ),
+            timeout=1,
+        )
+        # then
+        self.assertSetEqual(set(result.data["releases"]), {"1.0.0"})
+
+    async def test_should_ignore_failing_index(self, mock_fetch):
+        # given
+        async def fetch(session, index, name):
+            if index == PRIMARY:
+                raise aiohttp.ClientConnectionError("down")
+            return {"info": {}, "releases": {"1.1.0": []}}
+
+        mock_fetch.side_effect = fetch
+        # when
+        result = await fetch_project_from_indexes_async(
+            mock.MagicMock(), "alpha", indexes=[PRIMARY, SECONDARY]
+        )
+        # then
+        self.assertSetEqual(set(result.data["releases"]), {"1.1.0"})
+
+    async def test_should_return_none_when_no_index_has_project(self, mock_fetch):
+        # given
+        mock_fetch.return_value = None
+        # when
+        result = await fetch_project_from_indexes_async(
+            mock.MagicMock(), "alpha", indexes=[PRIMARY, SECONDARY]
+        )
+        # then
+        self.assertIsNone(result)
+
+
+class TestFetchProjectFromIndexesRequests(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_abort_requests_to_skipped_indexes(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        authoritative = PackageIndex(
+            name="Private", url="https://private.example.com", authoritative=True
+        )
+        requests_mocker.get(
+            "https://private.example.com/alpha/json",
+            payload={"info": {}, "releases": {"1.0.0": []}},
+        )
+        slow_request_started = asyncio.Event()
+        slow_request_aborted = asyncio.Event()
+
+        async def slow_response(url, **kwargs):
+            slow_request_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                slow_request_aborted.set()
+                raise
+
+        requests_mocker.get(
+            "https://secondary.example.com/alpha/json", callback=slow_response
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope():
+                fetch = asyncio.create_task(
+                    fetch_project_from_indexes_async(
+                        session, "alpha", indexes=[authoritative, SECONDARY]
+                    )
+                )
+                await asyncio.wait_for(slow_request_started.wait(), timeout=1)
+                result = await asyncio.wait_for(fetch, timeout=1)
+                # then
+                await asyncio.wait_for(slow_request_aborted.wait(), timeout=1)
+        self.assertSetEqual(set(result.data["releases"]), {"1.0.0"})
@@ -1,28 +1,61 @@
-from unittest import IsolatedAsyncioTestCase
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock, skipUnless
 
 import aiohttp
 from aioresponses import aioresponses
 from packaging.version import Version
+from yarl import URL
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from app_utils.testing import NoSocketsTestCase
 
 from package_monitor.core.pypi import (
+    PYPI_INDEX,
+    PackageIndex,
+    ReleaseStore,
+    _json_loads,
+    _make_cache_key,
+    _pack_cache_value,
+    _parse_project_stream,
+    _slim_project_data,
+    _unpack_cache_value,
     clear_cache,
+    core_metadata_url,
+    fetch_project_from_index_async,
     fetch_project_from_pypi_async,
     fetch_pypi_releases,
     fetch_release_from_pypi_async,
+    refresh_scope,
 )
 from package_monitor.tests.factories import DistributionPackageFactory, PypiFactory
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+MODULE_PATH = "package_monitor.core.pypi"
+
+EVE_INDEX = PackageIndex(name="EVE University", url="https://pypi.eveuniversity.org")
+
 
 class TestFetchDataFromPypi(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
     @aioresponses()
     async def test_should_return_data(self, requests_mocker: aioresponses):
         # given
-        requests_mocker.get("https://pypi.org/pypi/alpha/json", payload={"alpha": 1})
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload={"info": {"name": "alpha"}}
+        )
         # when
         async with aiohttp.ClientSession() as session:
             result = await fetch_project_from_pypi_async(session, "alpha")
         # then
-        self.assertEqual(result, {"alpha": 1})
+        self.assertEqual(result, {"info": {"name": "alpha"}})
 
     @aioresponses()
     async def test_should_return_none_when_package_does_not_exist(
@@ -36,6 +69,188 @@ class TestFetchDataFromPypi(IsolatedAsyncioTestCase):
         # then
         self.assertIsNone(result)
 
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
+    @aioresponses()
+    async def test_should_return_none_on_timeout(self, requests_mocker: aioresponses):
+        # given
+        index = PackageIndex(name="Dummy", url="https://pypi.example.com", timeout=1)
+        requests_mocker.get(
+            "https://pypi.example.com/alpha/json", exception=asyncio.TimeoutError()
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_index_async(session, index, "alpha")
+        # then
+        self.assertIsNone(result)
+        (request,) = requests_mocker.requests[
+            ("GET", URL("https://pypi.example.com/alpha/json"))
+        ]
+        self.assertEqual(request.kwargs["timeout"].total, 1)
+
+    @aioresponses()
+    async def test_should_remember_package_not_found(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get("https://pypi.eveuniversity.org/alpha/json", status=404)
+        # when
+        async with aiohttp.ClientSession() as session:
+            result_1 = await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+            result_2 = await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+        # then
+        self.assertIsNone(result_1)
+        self.assertIsNone(result_2)
+        requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_remember_package_not_found_per_index(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get("https://pypi.eveuniversity.org/alpha/json", status=404)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload={"info": {"name": "alpha"}}
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+    @aioresponses()
+    async def test_should_remember_package_not_found_per_index_on_same_host(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        mirror = PackageIndex(name="Mirror", url="https://devpi.example.com/root/pypi")
+        private = PackageIndex(
+            name="Private", url="https://devpi.example.com/private/dev"
+        )
+        requests_mocker.get(
+            "https://devpi.example.com/root/pypi/alpha/json", status=404
+        )
+        requests_mocker.get(
+            "https://devpi.example.com/private/dev/alpha/json",
+            payload={"info": {"name": "alpha"}},
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_index_async(session, mirror, "alpha")
+            result = await fetch_project_from_index_async(session, private, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+    @aioresponses()
+    async def test_should_not_remember_package_not_found_when_disabled(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.eveuniversity.org/alpha/json"
+        requests_mocker.get(url, status=404)
+        requests_mocker.get(url, status=404)
+        # when
+        with mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_NOT_FOUND_CACHE_TIMEOUT", 0):
+            async with aiohttp.ClientSession() as session:
+                await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+                await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+        # then
+        self.assertEqual(len(requests_mocker.requests[("GET", URL(url))]), 2)
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
+    @aioresponses()
+    async def test_should_not_remember_other_http_errors(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.eveuniversity.org/alpha/json"
+        requests_mocker.get(url, status=500)
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}})
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+            result = await fetch_project_from_index_async(session, EVE_INDEX, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+    @aioresponses()
+    async def test_should_share_concurrent_requests_for_same_url(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload={"info": {"name": "alpha"}}
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope():
+                result_1, result_2 = await asyncio.gather(
+                    fetch_project_from_pypi_async(session, "alpha"),
+                    fetch_project_from_pypi_async(session, "alpha"),
+                )
+        # then
+        self.assertEqual(result_1, {"info": {"name": "alpha"}})
+        self.assertEqual(result_2, {"info": {"name": "alpha"}})
+        requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_keep_shared_request_while_a_caller_is_waiting(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        async def slow_response(url, **kwargs):
+            await asyncio.sleep(0.1)
+
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json",
+            callback=slow_response,
+            payload={"info": {"name": "alpha"}},
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope():
+                task_1 = asyncio.create_task(
+                    fetch_project_from_pypi_async(session, "alpha")
+                )
+                task_2 = asyncio.create_task(
+                    fetch_project_from_pypi_async(session, "alpha")
+                )
+                await asyncio.sleep(0.01)
+                task_1.cancel()
+                result = await task_2
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+        requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_cancel_requests_in_flight_when_leaving_refresh(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        request_aborted = False
+
+        async def slow_response(url, **kwargs):
+            nonlocal request_aborted
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                request_aborted = True
+                raise
+
+        requests_mocker.get("https://pypi.org/pypi/alpha/json", callback=slow_response)
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope():
+                task = asyncio.create_task(
+                    fetch_project_from_pypi_async(session, "alpha")
+                )
+                await asyncio.sleep(0.05)
+            # then
+            self.assertTrue(request_aborted)
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
     @aioresponses()
     async def test_should_return_none_on_other_http_errors(
         self, requests_mocker: aioresponses
@@ -49,7 +264,306 @@ class TestFetchDataFromPypi(IsolatedAsyncioTestCase):
         self.assertIsNone(result)
 
 
-class TestFetchPypiReleases(IsolatedAsyncioTestCase):
+@mock.patch("package_monitor.core.request_limits.RETRY_BACKOFF_BASE", 0)
+@mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 3)
+class TestFetchWithRetries(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_retry_on_server_error(self, requests_mocker: aioresponses):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, status=503)
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}})
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+    @aioresponses()
+    async def test_should_retry_on_network_error(self, requests_mocker: aioresponses):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, exception=aiohttp.ServerDisconnectedError())
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}})
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+    @aioresponses()
+    async def test_should_retry_when_reading_body_fails(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}}, repeat=True)
+        original_read = aiohttp.ClientResponse.read
+        reads = 0
+
+        async def read(self):
+            nonlocal reads
+            reads += 1
+            if reads == 1:
+                raise aiohttp.ClientPayloadError("Response payload is not completed")
+            return await original_read(self)
+
+        # when
+        with mock.patch(MODULE_PATH + ".ijson", None), mock.patch.object(
+            aiohttp.ClientResponse, "read", read
+        ):
+            async with aiohttp.ClientSession() as session:
+                result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+        self.assertEqual(len(requests_mocker.requests[("GET", URL(url))]), 2)
+
+    @skipUnless(ijson, "requires ijson")
+    @aioresponses()
+    async def test_should_retry_when_parsing_stream_fails(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}}, repeat=True)
+        original_parser = _parse_project_stream
+        calls = 0
+
+        async def parser(stream):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise asyncio.TimeoutError()
+            return await original_parser(stream)
+
+        # when
+        with mock.patch(MODULE_PATH + "._parse_project_stream", parser):
+            async with aiohttp.ClientSession() as session:
+                result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+        self.assertEqual(len(requests_mocker.requests[("GET", URL(url))]), 2)
+
+    @aioresponses()
+    async def test_should_give_up_after_max_attempts(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, status=429, repeat=True)
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertIsNone(result)
+        self.assertEqual(len(requests_mocker.requests[("GET", URL(url))]), 3)
+
+    @aioresponses()
+    async def test_should_not_retry_on_client_error(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, status=403, repeat=True)
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertIsNone(result)
+        self.assertEqual(len(requests_mocker.requests[("GET", URL(url))]), 1)
+
+    @aioresponses()
+    async def test_should_return_none_when_network_keeps_failing(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(
+            url, exception=aiohttp.ServerDisconnectedError(), repeat=True
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertIsNone(result)
+
+
+class TestFetchProjectConditionally(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_reuse_stored_data_when_not_modified(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(
+            url,
+            payload={"info": {"name": "alpha"}},
+            headers={"ETag": '"abc"', "Last-Modified": "Tue, 01 Oct 2024 10:00:00 GMT"},
+        )
+        requests_mocker.get(url, status=304)
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_pypi_async(session, "alpha")
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+        calls = requests_mocker.requests[("GET", URL(url))]
+        self.assertEqual(len(calls), 2)
+        self.assertNotIn("If-None-Match", calls[0].kwargs["headers"])
+        self.assertEqual(calls[1].kwargs["headers"]["If-None-Match"], '"abc"')
+        self.assertEqual(
+            calls[1].kwargs["headers"]["If-Modified-Since"],
+            "Tue, 01 Oct 2024 10:00:00 GMT",
+        )
+
+    @aioresponses()
+    async def test_should_replace_stored_data_when_modified(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(
+            url, payload={"info": {"name": "alpha"}}, headers={"ETag": '"abc"'}
+        )
+        requests_mocker.get(
+            url, payload={"info": {"name": "Alpha"}}, headers={"ETag": '"def"'}
+        )
+        requests_mocker.get(url, status=304)
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_pypi_async(session, "alpha")
+            result_1 = await fetch_project_from_pypi_async(session, "alpha")
+            result_2 = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result_1, {"info": {"name": "Alpha"}})
+        self.assertEqual(result_2, {"info": {"name": "Alpha"}})
+
+    @aioresponses()
+    async def test_should_not_send_validators_when_nothing_stored(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        url = "https://pypi.org/pypi/alpha/json"
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}})
+        requests_mocker.get(url, payload={"info": {"name": "alpha"}})
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_project_from_pypi_async(session, "alpha")
+            await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        calls = requests_mocker.requests[("GET", URL(url))]
+        self.assertNotIn("If-None-Match", calls[1].kwargs["headers"])
+
+
+@mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_SIMPLE_API_ENABLED", True)
+class TestFetchProjectFromSimpleApi(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_return_data_in_json_api_format(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/simple/alpha/",
+            payload={
+                "meta": {"api-version": "1.1"},
+                "name": "alpha",
+                "versions": ["1.0", "1.1.0", "1.2.0"],
+                "files": [
+                    {
+                        "filename": "alpha-1.0.tar.gz",
+                        "url": "https://files.example.com/alpha-1.0.tar.gz",
+                        "hashes": {},
+                        "yanked": False,
+                    },
+                    {
+                        "filename": "alpha-1.1.0-py3-none-any.whl",
+                        "url": "https://files.example.com/alpha-1.1.0-py3-none-any.whl",
+                        "hashes": {},
+                        "requires-python": ">=3.8",
+                        "yanked": "broken release",
+                        "core-metadata": {"sha256": "abc"},
+                    },
+                    {
+                        "filename": "alpha-1.1.0.exe",
+                        "url": "https://files.example.com/alpha-1.1.0.exe",
+                        "hashes": {},
+                    },
+                ],
+            },
+            content_type="application/vnd.pypi.simple.v1+json",
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(
+            result["info"]["project_url"], "https://pypi.org/project/alpha/"
+        )
+        self.assertSetEqual(set(result["releases"]), {"1.0", "1.1.0", "1.2.0"})
+        self.assertEqual(result["releases"]["1.0"][0]["requires_python"], "")
+        self.assertFalse(result["releases"]["1.0"][0]["yanked"])
+        release = result["releases"]["1.1.0"]
+        self.assertEqual(len(release), 1)
+        self.assertEqual(release[0]["requires_python"], ">=3.8")
+        self.assertTrue(release[0]["yanked"])
+        self.assertTrue(release[0]["core_metadata"])
+        self.assertFalse(result["releases"]["1.0"][0]["core_metadata"])
+        self.assertEqual(result["releases"]["1.2.0"], [])
+        calls = requests_mocker.requests[("GET", URL("https://pypi.org/simple/alpha/"))]
+        self.assertEqual(
+            calls[0].kwargs["headers"]["Accept"],
+            "application/vnd.pypi.simple.v1+json",
+        )
+
+    @aioresponses()
+    async def test_should_not_link_pypi_for_other_indexes(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        index = PackageIndex(
+            name="Private",
+            url="https://private.example.com/pypi",
+            simple_url="https://private.example.com/simple",
+        )
+        requests_mocker.get(
+            "https://private.example.com/simple/alpha/",
+            payload={"meta": {"api-version": "1.1"}, "name": "alpha", "files": []},
+            content_type="application/vnd.pypi.simple.v1+json",
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_index_async(session, index, "alpha")
+        # then
+        self.assertEqual(result["info"]["project_url"], "")
+
+    @aioresponses()
+    async def test_should_fall_back_to_json_api(self, requests_mocker: aioresponses):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/simple/alpha/",
+            body="<html></html>",
+            content_type="text/html",
+        )
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload={"info": {"name": "alpha"}}
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertEqual(result, {"info": {"name": "alpha"}})
+
+
+class TestFetchPypiReleases(TestCase):
     def setUp(self) -> None:
         clear_cache()
 
@@ -81,31 +595,283 @@ class TestFetchPypiReleases(IsolatedAsyncioTestCase):
         self.assertEqual(p["info"]["name"], "alpha")
         self.assertEqual(p["info"]["version"], "1.2.5")
 
-
-class TestFetchPypiRelease(IsolatedAsyncioTestCase):
-    def setUp(self) -> None:
-        clear_cache()
-
     @aioresponses()
-    async def test_should_return_data(self, requests_mocker: aioresponses):
+    async def test_should_store_fetched_releases(self, requests_mocker: aioresponses):
         # given
-        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        dist = DistributionPackageFactory(
+            name="Alpha", current="1.2.3", requires=["bravo>=1.0"]
+        )
         pypi = PypiFactory(distribution=dist)
         requests_mocker.get(
-            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+            "https://pypi.org/pypi/Alpha/1.2.3/json", payload=pypi.asdict()
         )
+        releases = ReleaseStore()
 
         # when
         async with aiohttp.ClientSession() as session:
-            result = await fetch_release_from_pypi_async(session, "alpha", "1.2.3")
+            async with refresh_scope(releases=releases):
+                await fetch_pypi_releases(session, "Alpha", [Version("1.2.3")])
 
         # then
-        self.assertEqual(result["info"]["name"], "alpha")
-        self.assertEqual(result["info"]["version"], "1.2.3")
-        requests_mocker.assert_called_once()
+        self.assertSetEqual(set(releases.new["alpha"]), {"1.2.3"})
+        info = releases.new["alpha"]["1.2.3"]["info"]
+        self.assertListEqual(info["requires_dist"], ["bravo>=1.0"])
+        self.assertEqual(info["requires_python"], "~=3.7")
 
     @aioresponses()
-    async def test_should_use_cache(self, requests_mocker: aioresponses):
+    async def test_should_use_stored_releases(self, requests_mocker: aioresponses):
+        # given
+        releases = ReleaseStore(
+            known={
+                "alpha": {
+                    "1.2.3": {
+                        "info": {"version": "1.2.3", "requires_dist": ["bravo>=1.0"]}
+                    }
+                }
+            }
+        )
+        dist = DistributionPackageFactory(name="alpha", current="1.2.5")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.5/json", payload=pypi.asdict()
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope(releases=releases):
+                result = await fetch_pypi_releases(
+                    session, "alpha", [Version("1.2.3"), Version("1.2.5")]
+                )
+
+        # then
+        self.assertEqual(result[0]["info"]["version"], "1.2.3")
+        self.assertListEqual(result[0]["info"]["requires_dist"], ["bravo>=1.0"])
+        self.assertEqual(result[1]["info"]["version"], "1.2.5")
+        requests_mocker.assert_called_once()
+        self.assertSetEqual(set(releases.new["alpha"]), {"1.2.5"})
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
+    @aioresponses()
+    async def test_should_not_store_failed_releases(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get("https://pypi.org/pypi/alpha/1.2.3/json", status=500)
+        releases = ReleaseStore()
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope(releases=releases):
+                result = await fetch_pypi_releases(session, "alpha", [Version("1.2.3")])
+
+        # then
+        self.assertListEqual(result, [None])
+        self.assertDictEqual(releases.new, {})
+
+    @aioresponses()
+    async def test_should_use_cached_releases(self, requests_mocker: aioresponses):
+        # given
+        dist_1 = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi_1 = PypiFactory(distribution=dist_1)
+        await cache.aset(_make_cache_key("alpha", "1.2.3"), pypi_1.asdict())
+        dist_2 = DistributionPackageFactory(name="alpha", current="1.2.5")
+        pypi_2 = PypiFactory(distribution=dist_2)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.5/json", payload=pypi_2.asdict()
+        )
+        releases = ReleaseStore()
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            async with refresh_scope(releases=releases):
+                result = await fetch_pypi_releases(
+                    session, "alpha", [Version("1.2.3"), Version("1.2.5")]
+                )
+
+        # then
+        self.assertEqual(result[0]["info"]["version"], "1.2.3")
+        self.assertEqual(result[1]["info"]["version"], "1.2.5")
+        requests_mocker.assert_called_once()
+        self.assertSetEqual(set(releases.new["alpha"]), {"1.2.3", "1.2.5"})
+
+    @aioresponses()
+    async def test_should_reuse_new_releases_within_refresh(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+
+        # when
+        with mock.patch(MODULE_PATH + ".cache", wraps=cache) as mock_cache:
+            async with aiohttp.ClientSession() as session:
+                async with refresh_scope():
+                    await fetch_pypi_releases(session, "alpha", [Version("1.2.3")])
+                    result = await fetch_pypi_releases(
+                        session, "alpha", [Version("1.2.3")]
+                    )
+
+        # then
+        self.assertEqual(result[0]["info"]["version"], "1.2.3")
+        requests_mocker.assert_called_once()
+        self.assertEqual(mock_cache.get_many.call_count, 1)
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
+    @aioresponses()
+    async def test_should_cache_fetched_releases(self, requests_mocker: aioresponses):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+        requests_mocker.get("https://pypi.org/pypi/alpha/1.2.5/json", status=500)
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_pypi_releases(
+                session, "alpha", [Version("1.2.3"), Version("1.2.5")]
+            )
+
+        # then
+        data = await cache.aget_many(
+            [_make_cache_key("alpha", "1.2.3"), _make_cache_key("alpha", "1.2.5")]
+        )
+        self.assertListEqual(list(data.keys()), [_make_cache_key("alpha", "1.2.3")])
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 1)
+    @aioresponses()
+    async def test_should_get_and_set_cache_in_one_request_each(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        cache.set(_make_cache_key("alpha", "1.2.3"), _pack_cache_value(pypi.asdict()))
+        for version in ["1.2.4", "1.2.5"]:
+            requests_mocker.get(
+                f"https://pypi.org/pypi/alpha/{version}/json", payload=pypi.asdict()
+            )
+
+        # when
+        with mock.patch(MODULE_PATH + ".cache", wraps=cache) as mock_cache:
+            async with aiohttp.ClientSession() as session:
+                await fetch_pypi_releases(
+                    session,
+                    "alpha",
+                    [Version("1.2.3"), Version("1.2.4"), Version("1.2.5")],
+                )
+
+        # then
+        self.assertEqual(mock_cache.get_many.call_count, 1)
+        self.assertEqual(mock_cache.set_many.call_count, 1)
+        (data,), _ = mock_cache.set_many.call_args
+        self.assertSetEqual(
+            set(data),
+            {_make_cache_key("alpha", "1.2.4"), _make_cache_key("alpha", "1.2.5")},
+        )
+
+
+class TestReleaseStore(NoSocketsTestCase):
+    def test_should_return_known_and_new_releases(self):
+        # given
+        store = ReleaseStore(known={"alpha": {"1.0.0": {"info": {}}}})
+        store.add("Alpha", {"1.1.0": {"info": {}}})
+        # when
+        result = store.releases("alpha", ["1.0.0", "1.1.0", "1.2.0"])
+        # then
+        self.assertSetEqual(set(result), {"1.0.0", "1.1.0"})
+        self.assertDictEqual(store.new, {"alpha": {"1.1.0": {"info": {}}}})
+
+
+class TestFetchPypiRelease(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_return_data(self, requests_mocker: aioresponses):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_release_from_pypi_async(session, "alpha", "1.2.3")
+
+        # then
+        self.assertEqual(result["info"]["name"], "alpha")
+        self.assertEqual(result["info"]["version"], "1.2.3")
+        requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_return_data_from_other_index(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_release_from_pypi_async(
+                session, "alpha", "1.2.3", index=EVE_INDEX
+            )
+
+        # then
+        self.assertEqual(result["info"]["version"], "1.2.3")
+
+    @aioresponses()
+    async def test_should_return_only_needed_fields(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        payload = pypi.asdict()
+        payload["info"]["description"] = "x" * 1000
+        payload["urls"] = [{"filename": "alpha-1.2.3.tar.gz"}]
+        requests_mocker.get("https://pypi.org/pypi/alpha/1.2.3/json", payload=payload)
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_release_from_pypi_async(session, "alpha", "1.2.3")
+
+        # then
+        self.assertSetEqual(set(result.keys()), {"info"})
+        self.assertNotIn("description", result["info"])
+        self.assertEqual(result["info"]["version"], "1.2.3")
+
+    @aioresponses()
+    async def test_should_store_compressed_data_in_cache(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            await fetch_release_from_pypi_async(session, "alpha", "1.2.3")
+
+        # then
+        value = await cache.aget(_make_cache_key("alpha", "1.2.3"))
+        self.assertIsInstance(value, bytes)
+        self.assertEqual(_unpack_cache_value(value)["info"]["version"], "1.2.3")
+
+    @aioresponses()
+    async def test_should_use_cache(self, requests_mocker: aioresponses):
         # given
         dist = DistributionPackageFactory(name="alpha", current="1.2.3")
         pypi = PypiFactory(distribution=dist)
@@ -122,3 +888,453 @@ class TestFetchPypiRelease(IsolatedAsyncioTestCase):
         # then
         self.assertEqual(result["info"]["version"], "1.2.3")
         requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_return_data_from_core_metadata(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://files.example.com/alpha-1.2.3-py3-none-any.whl.metadata",
+            body=(
+                "Metadata-Version: 2.1\n"
+                "Name: alpha\n"
+                "Version: 1.2.3\n"
+                "Requires-Python: >=3.8\n"
+                "Requires-Dist: bravo>=1.0\n"
+                'Requires-Dist: charlie; extra == "test"\n'
+                "\n"
+                "A long description\n"
+            ),
+            content_type="text/plain",
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_release_from_pypi_async(
+                session,
+                "alpha",
+                "1.2.3",
+                metadata_url=(
+                    "https://files.example.com/alpha-1.2.3-py3-none-any.whl.metadata"
+                ),
+            )
+
+        # then
+        self.assertEqual(result["info"]["version"], "1.2.3")
+        self.assertEqual(result["info"]["requires_python"], ">=3.8")
+        self.assertListEqual(
+            result["info"]["requires_dist"],
+            ["bravo>=1.0", 'charlie; extra == "test"'],
+        )
+        requests_mocker.assert_called_once()
+
+    @aioresponses()
+    async def test_should_fall_back_to_json_api_when_metadata_fails(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        dist = DistributionPackageFactory(name="alpha", current="1.2.3")
+        pypi = PypiFactory(distribution=dist)
+        requests_mocker.get(
+            "https://files.example.com/alpha-1.2.3-py3-none-any.whl.metadata",
+            status=404,
+        )
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/1.2.3/json", payload=pypi.asdict()
+        )
+
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_release_from_pypi_async(
+                session,
+                "alpha",
+                "1.2.3",
+                metadata_url=(
+                    "https://files.example.com/alpha-1.2.3-py3-none-any.whl.metadata"
+                ),
+            )
+
+        # then
+        self.assertEqual(result["info"]["version"], "1.2.3")
+
+
+@mock.patch("package_monitor.core.request_limits.RETRY_BACKOFF_BASE", 0)
+@mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_ATTEMPTS", 3)
+@mock.patch(
+    "package_monitor.core.request_limits.PACKAGE_MONITOR_CIRCUIT_BREAKER_THRESHOLD", 2
+)
+class TestFetchWithCircuitBreaker(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    @aioresponses()
+    async def test_should_skip_unavailable_host_during_refresh(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        for name in ["alpha", "bravo"]:
+            requests_mocker.get(
+                f"https://pypi.eveuniversity.org/{name}/json",
+                exception=aiohttp.ClientConnectionError(),
+                repeat=True,
+            )
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/charlie/json",
+            payload={"info": {"name": "charlie"}},
+        )
+        # when
+        async with refresh_scope():
+            async with aiohttp.ClientSession() as session:
+                for name in ["alpha", "bravo", "charlie"]:
+                    result = await fetch_project_from_index_async(
+                        session, EVE_INDEX, name
+                    )
+        # then
+        self.assertIsNone(result)
+        requests = requests_mocker.requests
+        alpha_url = URL("https://pypi.eveuniversity.org/alpha/json")
+        self.assertEqual(len(requests[("GET", alpha_url)]), 3)
+        charlie_url = URL("https://pypi.eveuniversity.org/charlie/json")
+        self.assertNotIn(("GET", charlie_url), requests)
+
+    @aioresponses()
+    async def test_should_not_count_retries_as_failures(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/alpha/json",
+            exception=aiohttp.ClientConnectionError(),
+            repeat=True,
+        )
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/bravo/json",
+            payload={"info": {"name": "bravo"}},
+        )
+        # when
+        async with refresh_scope():
+            async with aiohttp.ClientSession() as session:
+                for name in ["alpha", "bravo"]:
+                    result = await fetch_project_from_index_async(
+                        session, EVE_INDEX, name
+                    )
+        # then
+        self.assertEqual(result, {"info": {"name": "bravo"}})
+
+    @aioresponses()
+    async def test_should_not_count_rate_limiting_as_failures(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        for name in ["alpha", "bravo"]:
+            requests_mocker.get(
+                f"https://pypi.eveuniversity.org/{name}/json",
+                status=429,
+                headers={"Retry-After": "0"},
+                repeat=True,
+            )
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/charlie/json",
+            payload={"info": {"name": "charlie"}},
+        )
+        # when
+        async with refresh_scope():
+            async with aiohttp.ClientSession() as session:
+                for name in ["alpha", "bravo", "charlie"]:
+                    result = await fetch_project_from_index_async(
+                        session, EVE_INDEX, name
+                    )
+        # then
+        self.assertEqual(result, {"info": {"name": "charlie"}})
+
+    @aioresponses()
+    async def test_should_not_reset_failures_after_other_errors(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        for name in ["alpha", "charlie"]:
+            requests_mocker.get(
+                f"https://pypi.eveuniversity.org/{name}/json",
+                exception=aiohttp.ClientConnectionError(),
+                repeat=True,
+            )
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/bravo/json",
+            exception=aiohttp.ClientError(),
+        )
+        requests_mocker.get(
+            "https://pypi.eveuniversity.org/delta/json",
+            payload={"info": {"name": "delta"}},
+        )
+        # when
+        async with refresh_scope():
+            async with aiohttp.ClientSession() as session:
+                for name in ["alpha", "bravo", "charlie", "delta"]:
+                    result = await fetch_project_from_index_async(
+                        session, EVE_INDEX, name
+                    )
+        # then
+        self.assertIsNone(result)
+        delta_url = URL("https://pypi.eveuniversity.org/delta/json")
+        self.assertNotIn(("GET", delta_url), requests_mocker.requests)
+
+
+class TestPackageIndex(NoSocketsTestCase):
+    def test_should_return_urls(self):
+        # given
+        index = PackageIndex(
+            name="Dummy",
+            url="https://pypi.example.com/pypi/",
+            simple_url="https://simple.example.com/simple",
+        )
+        # when/then
+        self.assertEqual(
+            index.project_url("alpha"), "https://pypi.example.com/pypi/alpha/json"
+        )
+        self.assertEqual(
+            index.release_url("alpha", "1.0"),
+            "https://pypi.example.com/pypi/alpha/1.0/json",
+        )
+        self.assertEqual(
+            index.simple_project_url("alpha"),
+            "https://simple.example.com/simple/alpha/",
+        )
+        self.assertSetEqual(index.hosts, {"pypi.example.com", "simple.example.com"})
+
+    def test_should_return_project_page_url_for_pypi_only(self):
+        # given
+        other = PackageIndex(name="Dummy", url="https://pypi.example.com/pypi/")
+        # when/then
+        self.assertEqual(
+            PYPI_INDEX.project_page_url("alpha"), "https://pypi.org/project/alpha/"
+        )
+        self.assertEqual(other.project_page_url("alpha"), "")
+
+
+class TestCoreMetadataUrl(NoSocketsTestCase):
+    def test_should_return_url_for_wheel_with_metadata(self):
+        # given
+        files = [
+            {"filename": "alpha-1.0.tar.gz", "url": "https://x/a.tar.gz"},
+            {
+                "filename": "alpha-1.0-py3-none-any.whl",
+                "url": "https://x/a.whl",
+                "core_metadata": True,
+            },
+        ]
+        # when/then
+        self.assertEqual(core_metadata_url(files), "https://x/a.whl.metadata")
+
+    def test_should_return_none_when_no_metadata(self):
+        # given
+        files = [
+            {
+                "filename": "alpha-1.0-py3-none-any.whl",
+                "url": "https://x/a.whl",
+                "core_metadata": False,
+            },
+            {"filename": "alpha-1.0.tar.gz", "url": "https://x/a.tar.gz"},
+        ]
+        # when/then
+        self.assertIsNone(core_metadata_url(files))
+
+
+class TestSlimProjectData(NoSocketsTestCase):
+    def test_should_keep_only_needed_fields(self):
+        # given
+        data = {
+            "info": {
+                "name": "alpha",
+                "project_url": "https://pypi.org/project/alpha/",
+                "description": "x" * 1000,
+            },
+            "releases": {
+                "1.0": [
+                    {
+                        "filename": "alpha-1.0.tar.gz",
+                        "url": "https://x/a.tar.gz",
+                        "yanked": False,
+                        "requires_python": ">=3.8",
+                        "digests": {"sha256": "abc"},
+                    }
+                ]
+            },
+            "urls": [],
+            "vulnerabilities": [],
+        }
+        # when
+        result = _slim_project_data(data)
+        # then
+        expected = {
+            "info": {
+                "name": "alpha",
+                "project_url": "https://pypi.org/project/alpha/",
+            },
+            "releases": {
+                "1.0": [
+                    {
+                        "filename": "alpha-1.0.tar.gz",
+                        "url": "https://x/a.tar.gz",
+                        "yanked": False,
+                        "requires_python": ">=3.8",
+                    }
+                ]
+            },
+        }
+        self.assertDictEqual(result, expected)
+
+
+class TestParseProjectStream(IsolatedAsyncioTestCase):
+    PROJECT_DATA = {
+        "info": {
+            "name": "alpha",
+            "project_url": "https://pypi.org/project/alpha/",
+            "description": "x" * 1000,
+            "project_urls": {"name": "other"},
+        },
+        "last_serial": 42,
+        "releases": {
+            "1.0.0": [
+                {
+                    "filename": "alpha-1.0.0.tar.gz",
+                    "url": "https://x/a.tar.gz",
+                    "yanked": False,
+                    "requires_python": None,
+                    "digests": {"sha256": "abc"},
+                    "size": 1.5,
+                },
+                {
+                    "filename": "alpha-1.0.0-py3-none-any.whl",
+                    "url": "https://x/a.whl",
+                    "yanked": True,
+                    "requires_python": ">=3.8",
+                },
+            ],
+            "2.0a1": [],
+        },
+        "urls": [],
+    }
+
+    def setUp(self) -> None:
+        clear_cache()
+
+    @skipUnless(ijson, "requires ijson")
+    @aioresponses()
+    async def test_should_return_same_data_as_projection(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload=self.PROJECT_DATA
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertDictEqual(result, _slim_project_data(self.PROJECT_DATA))
+
+    @aioresponses()
+    async def test_should_return_same_data_without_ijson(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json", payload=self.PROJECT_DATA
+        )
+        # when
+        with mock.patch(MODULE_PATH + ".ijson", None):
+            async with aiohttp.ClientSession() as session:
+                result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertDictEqual(result, _slim_project_data(self.PROJECT_DATA))
+
+    @aioresponses()
+    async def test_should_return_none_for_invalid_json(
+        self, requests_mocker: aioresponses
+    ):
+        # given
+        requests_mocker.get(
+            "https://pypi.org/pypi/alpha/json",
+            body='{"info": {"name": "alpha"',
+            content_type="application/json",
+        )
+        # when
+        async with aiohttp.ClientSession() as session:
+            result = await fetch_project_from_pypi_async(session, "alpha")
+        # then
+        self.assertIsNone(result)
+
+
+class TestJsonLoads(NoSocketsTestCase):
+    def test_should_decode_json(self):
+        # given
+        payload = b'{"info": {"name": "alpha", "yanked": false, "size": 1.5}}'
+        # when
+        result = _json_loads(payload)
+        # then
+        self.assertDictEqual(
+            result, {"info": {"name": "alpha", "yanked": False, "size": 1.5}}
+        )
+
+    def test_should_decode_json_without_orjson(self):
+        # given
+        payload = b'{"info": {"name": "alpha"}}'
+        # when
+        with mock.patch(MODULE_PATH + ".orjson", None):
+            result = _json_loads(payload)
+        # then
+        self.assertDictEqual(result, {"info": {"name": "alpha"}})
+
+    def test_should_raise_value_error_for_invalid_json(self):
+        with self.assertRaises(ValueError):
+            _json_loads(b'{"info": ')
+
+    def test_should_raise_value_error_for_invalid_json_without_orjson(self):
+        with mock.patch(MODULE_PATH + ".orjson", None):
+            with self.assertRaises(ValueError):
+                _json_loads(b'{"info": ')
+
+
+class TestPackCacheValue(NoSocketsTestCase):
+    def test_should_restore_packed_value(self):
+        # given
+        value = {"info": {"name": "alpha", "requires_dist": ["bravo>=1.0"]}}
+        # when
+        result = _unpack_cache_value(_pack_cache_value(value))
+        # then
+        self.assertDictEqual(result, value)
+
+    def test_should_restore_packed_value_without_msgpack(self):
+        # given
+        value = {"info": {"name": "alpha", "requires_dist": ["bravo>=1.0"]}}
+        # when
+        with mock.patch(MODULE_PATH + ".msgpack", None):
+            packed = _pack_cache_value(value)
+            result = _unpack_cache_value(packed)
+        # then
+        self.assertTrue(packed.startswith(b"j"))
+        self.assertDictEqual(result, value)
+
+    def test_should_not_pack_when_disabled(self):
+        # given
+        value = {"info": {"name": "alpha"}}
+        # when
+        with mock.patch(
+            MODULE_PATH + ".PACKAGE_MONITOR_CACHE_COMPRESSION_ENABLED", False
+        ):
+            result = _pack_cache_value(value)
+        # then
+        self.assertIs(result, value)
+
+    def test_should_return_uncompressed_value_unchanged(self):
+        # given
+        value = {"info": {"name": "alpha"}}
+        # when/then
+        self.assertIs(_unpack_cache_value(value), value)
+
+    def test_should_return_none_for_invalid_value(self):
+        # when
+        result = _unpack_cache_value(b"mnot-compressed")
+        # then
+        self.assertIsNone(result)
@@ -0,0 +1,104 @@
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+from app_utils.testing import NoSocketsTestCase
+
+from package_monitor.core.release_index import ReleaseIndex
+
+SYSTEM_PYTHON = Version("3.10.1")
+
+
+def _file(**kwargs) -> dict:
+    return {"filename": "alpha-1.0.0.tar.gz", "url": "https://x/a.tar.gz", **kwargs}
+
+
+class TestReleaseIndex(NoSocketsTestCase):
+    def test_should_sort_releases_and_ignore_invalid_versions(self):
+        # given
+        releases = {"1.10.0": [], "1.2.0": [], "invalid": [], "1.0.0alpha1": []}
+        # when
+        index = ReleaseIndex("alpha", releases)
+        # then
+        self.assertListEqual(index.versions, [Version("1.2.0"), Version("1.10.0")])
+        self.assertListEqual(index.releases, ["1.2.0", "1.10.0"])
+        self.assertEqual(len(index), 2)
+
+    def test_should_return_newer_releases_as_updates(self):
+        # given
+        releases = {"0.9.0": [], "1.0.0": [], "1.1.0": [_file()], "1.2.0": []}
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result = index.updates(Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON)
+        # then
+        self.assertListEqual(result, [Version("1.1.0"), Version("1.2.0")])
+
+    def test_should_return_updates_matching_specifiers(self):
+        # given
+        releases = {"1.0.0": [], "1.1.0": [], "2.0.0": []}
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result = index.updates(Version("0.1"), SpecifierSet("<2"), SYSTEM_PYTHON)
+        # then
+        self.assertListEqual(result, [Version("1.0.0"), Version("1.1.0")])
+
+    def test_should_ignore_yanked_releases(self):
+        # given
+        releases = {"1.1.0": [_file(yanked=True)], "1.2.0": [_file(yanked=False)]}
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result = index.updates(Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON)
+        # then
+        self.assertListEqual(result, [Version("1.2.0")])
+
+    def test_should_use_last_file_of_release(self):
+        # given
+        releases = {"1.1.0": [_file(yanked=True), _file(yanked=False)]}
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result = index.updates(Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON)
+        # then
+        self.assertListEqual(result, [Version("1.1.0")])
+
+    def test_should_ignore_prereleases_unless_allowed(self):
+        # given
+        releases = {"1.1.0a1": [], "1.1.0": []}
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result_1 = index.updates(Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON)
+        result_2 = index.updates(
+            Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON, allow_prereleases=True
+        )
+        # then
+        self.assertListEqual(result_1, [Version("1.1.0")])
+        self.assertListEqual(result_2, [Version("1.1.0a1"), Version("1.1.0")])
+
+    def test_should_ignore_releases_not_supporting_system_python(self):
+        # given
+        releases = {
+            "1.1.0": [_file(requires_python=">=3.8")],
+            "1.2.0": [_file(requires_python=">=3.11")],
+            "1.3.0": [_file(requires_python="invalid")],
+            "1.4.0": [_file(requires_python=None)],
+        }
+        index = ReleaseIndex("alpha", releases)
+        # when
+        result = index.updates(Version("1.0.0"), SpecifierSet(), SYSTEM_PYTHON)
+        # then
+        self.assertListEqual(result, [Version("1.1.0"), Version("1.4.0")])
+
+    def test_should_provide_metadata_urls(self):
+        # given
+        releases = {
+            "1.1.0": [
+                _file(
+                    filename="alpha-1.1.0-py3-none-any.whl",
+                    url="https://x/a.whl",
+                    core_metadata=True,
+                )
+            ],
+            "1.2.0": [_file()],
+        }
+        # when
+        index = ReleaseIndex("alpha", releases)
+        # then
+        self.assertDictEqual(index.metadata_urls, {"1.1.0": "https://x/a.whl.metadata"})
@@ -0,0 +1,281 @@
+import asyncio
+import datetime as dt
+from email.utils import format_datetime
+from unittest import IsolatedAsyncioTestCase, mock
+
+from app_utils.testing import NoSocketsTestCase
+
+from package_monitor.core.request_limits import (
+    AdaptiveConcurrency,
+    CircuitBreaker,
+    RequestLimiter,
+    retry_delay,
+)
+
+MODULE_PATH = "package_monitor.core.request_limits"
+
+
+class TestRequestLimiter(IsolatedAsyncioTestCase):
+    async def _run_requests(self, limiter: RequestLimiter, urls: list) -> int:
+        running = 0
+        max_running = 0
+
+        async def request(url):
+            nonlocal running, max_running
+            async with limiter.slot(url):
+                running += 1
+                max_running = max(running, max_running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[request(url) for url in urls])
+        return max_running
+
+    async def test_should_limit_concurrent_requests(self):
+        # given
+        limiter = RequestLimiter(max_concurrency=3)
+        urls = [f"https://www.example.com/{i}" for i in range(10)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 3)
+
+    async def test_should_limit_concurrent_requests_per_host(self):
+        # given
+        limiter = RequestLimiter(max_concurrency_per_host=2)
+        urls = [f"https://www.example.com/{i}" for i in range(10)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 2)
+
+    async def test_should_not_limit_other_hosts(self):
+        # given
+        limiter = RequestLimiter(max_concurrency_per_host=1)
+        urls = [f"https://www.example-{i}.com/" for i in range(5)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 5)
+
+    async def test_should_not_limit_when_unlimited(self):
+        # given
+        limiter = RequestLimiter()
+        urls = [f"https://www.example.com/{i}" for i in range(10)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 10)
+
+    async def test_should_adapt_concurrency_per_host(self):
+        # given
+        limiter = RequestLimiter(max_concurrency_per_host=8, adaptive=True)
+        urls = [f"https://www.example.com/{i}" for i in range(20)]
+        limiter.record(urls[0], ok=False, latency=0.1)
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 2)
+
+    async def test_should_limit_hosts_with_own_limit(self):
+        # given
+        limiter = RequestLimiter(
+            max_concurrency_per_host=5, host_limits={"www.example.com": 2}
+        )
+        urls = [f"https://www.example.com/{i}" for i in range(10)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 2)
+
+    async def test_should_apply_lower_limit_per_host(self):
+        # given
+        limiter = RequestLimiter(
+            max_concurrency_per_host=2, host_limits={"www.example.com": 5}
+        )
+        urls = [f"https://www.example.com/{i}" for i in range(10)]
+        # when
+        result = await self._run_requests(limiter, urls)
+        # then
+        self.assertEqual(result, 2)
+
+
+class TestAdaptiveConcurrency(IsolatedAsyncioTestCase):
+    def test_should_start_with_half_of_max_limit(self):
+        # when
+        obj = AdaptiveConcurrency(max_limit=10)
+        # then
+        self.assertEqual(obj.limit, 5)
+
+    def test_should_increase_limit_by_one_after_full_window(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=4)
+        # when
+        for _ in range(4):
+            obj.record(ok=True, latency=0.1)
+        # then
+        self.assertAlmostEqual(obj.limit, 5, delta=0.2)
+
+    def test_should_not_increase_above_max_limit(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=3, initial_limit=3)
+        # when
+        for _ in range(10):
+            obj.record(ok=True, latency=0.1)
+        # then
+        self.assertEqual(obj.limit, 3)
+
+    def test_should_halve_limit_on_failure(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=8)
+        # when
+        obj.record(ok=False, latency=0.1)
+        # then
+        self.assertEqual(obj.limit, 4)
+
+    def test_should_decrease_only_once_for_same_congestion(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=8)
+        # when
+        obj.record(ok=False, latency=10)
+        obj.record(ok=False, latency=10)
+        # then
+        self.assertEqual(obj.limit, 4)
+
+    def test_should_not_decrease_below_min_limit(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=1)
+        # when
+        obj.record(ok=False, latency=0.1)
+        # then
+        self.assertEqual(obj.limit, 1)
+
+    def test_should_halve_limit_on_latency_spike(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=8)
+        obj.record(ok=True, latency=0.1)
+        limit = obj.limit
+        # when
+        obj.record(ok=True, latency=2)
+        # then
+        self.assertEqual(obj.limit, limit / 2)
+
+    async def test_should_limit_concurrent_requests(self):
+        # given
+        obj = AdaptiveConcurrency(max_limit=10, initial_limit=3)
+        running = 0
+        max_running = 0
+
+        async def request():
+            nonlocal running, max_running
+            async with obj.slot():
+                running += 1
+                max_running = max(running, max_running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        # when
+        await asyncio.gather(*[request() for _ in range(10)])
+        # then
+        self.assertEqual(max_running, 3)
+
+
+@mock.patch(MODULE_PATH + ".time.monotonic")
+class TestCircuitBreaker(NoSocketsTestCase):
+    def test_should_allow_requests_below_threshold(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+        breaker.record_failure("https://www.example.com/1")
+        breaker.record_failure("https://www.example.com/2")
+        # when/then
+        self.assertTrue(breaker.allow("https://www.example.com/3"))
+
+    def test_should_skip_requests_after_consecutive_failures(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        breaker.record_failure("https://www.example.com/1")
+        breaker.record_failure("https://www.example.com/2")
+        # when/then
+        self.assertFalse(breaker.allow("https://www.example.com/3"))
+        self.assertTrue(breaker.allow("https://www.other.com/3"))
+
+    def test_should_reset_failures_after_success(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        breaker.record_failure("https://www.example.com/1")
+        breaker.record_success("https://www.example.com/2")
+        breaker.record_failure("https://www.example.com/3")
+        # when/then
+        self.assertTrue(breaker.allow("https://www.example.com/4"))
+
+    def test_should_allow_one_trial_request_after_cooldown(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+        breaker.record_failure("https://www.example.com/1")
+        mock_monotonic.return_value = 161
+        # when/then
+        self.assertTrue(breaker.allow("https://www.example.com/2"))
+        self.assertFalse(breaker.allow("https://www.example.com/3"))
+
+    def test_should_close_after_successful_trial_request(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+        breaker.record_failure("https://www.example.com/1")
+        mock_monotonic.return_value = 161
+        breaker.allow("https://www.example.com/2")
+        # when
+        breaker.record_success("https://www.example.com/2")
+        # then
+        self.assertTrue(breaker.allow("https://www.example.com/3"))
+
+    def test_should_always_allow_when_disabled(self, mock_monotonic):
+        # given
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=0, cooldown=60)
+        for i in range(10):
+            breaker.record_failure(f"https://www.example.com/{i}")
+        # when/then
+        self.assertTrue(breaker.allow("https://www.example.com/"))
+
+
+class TestRetryDelay(NoSocketsTestCase):
+    def test_should_use_exponential_backoff_with_jitter(self):
+        for attempt, max_delay in [(1, 0.5), (2, 1), (3, 2), (10, 30)]:
+            with self.subTest(attempt=attempt):
+                result = retry_delay(attempt)
+                self.assertGreaterEqual(result, 0)
+                self.assertLessEqual(result, max_delay)
+
+    def test_should_honor_retry_after_in_seconds(self):
+        # given
+        headers = {"Retry-After": "7"}
+        # when/then
+        self.assertEqual(retry_delay(1, headers), 7)
+
+    def test_should_limit_retry_after(self):
+        # given
+        headers = {"Retry-After": "3600"}
+        # when/then
+        with mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_RETRY_MAX_DELAY", 30):
+            self.assertEqual(retry_delay(1, headers), 30)
+
+    def test_should_honor_retry_after_as_date(self):
+        # given
+        retry_at = dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=20)
+        headers = {"Retry-After": format_datetime(retry_at, usegmt=True)}
+        # when
+        result = retry_delay(1, headers)
+        # then
+        self.assertGreater(result, 15)
+        self.assertLessEqual(result, 20)
+
+    def test_should_ignore_invalid_retry_after(self):
+        # given
+        headers = {"Retry-After": "soon"}
+        # when/then
+        self.assertLessEqual(retry_delay(1, headers), 0.5)
@@ -0,0 +1,157 @@
+import random
+
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import Version
+
+from app_utils.testing import NoSocketsTestCase
+
+from package_monitor.core.specifier_intervals import (
+    Interval,
+    compile_specifiers,
+    filter_indexes_in_specifiers,
+)
+
+
+def _random_version(rng: random.Random, allow_local: bool = True) -> str:
+    release = ".".join(
+        str(rng.choice([0, 0, 1, 2, 3])) for _ in range(rng.randint(1, 3))
+    )
+    version = f"1!{release}" if rng.random() < 0.05 else release
+    if rng.random() < 0.25:
+        version += rng.choice(["a", "b", "rc"]) + str(rng.randint(0, 2))
+    if rng.random() < 0.25:
+        version += f".post{rng.randint(0, 2)}"
+    if rng.random() < 0.2:
+        version += f".dev{rng.randint(0, 2)}"
+    if allow_local and rng.random() < 0.1:
+        version += f"+local{rng.randint(0, 1)}"
+    return version
+
+
+class TestCompileSpecifiers(NoSocketsTestCase):
+    VERSIONS = sorted(
+        Version(v)
+        for v in {
+            "0.9",
+            "1.0.dev0",
+            "1.0a1",
+            "1.0",
+            "1.0+local",
+            "1.0.post1",
+            "1.0.1",
+            "1.1rc1",
+            "1.1",
+            "1.1.5",
+            "1.2",
+            "1.10",
+            "2.0.dev1",
+            "2.0",
+            "1!0.1",
+        }
+    )
+
+    def test_should_filter_like_specifiers(self):
+        cases = [
+            ">=1.0",
+            ">1.0",
+            "<=1.0",
+            "<1.1",
+            "==1.0",
+            "!=1.0",
+            "==1.1.*",
+            "!=1.1.*",
+            "~=1.1",
+            "~=1.0.1",
+            ">=1.0,<2,!=1.1",
+            ">1.0a1",
+            "<2.0.dev1",
+            ">=1.0,<1.0",
+        ]
+        for case in cases:
+            with self.subTest(specifiers=case):
+                specifiers = SpecifierSet(case)
+                # when
+                result = compile_specifiers(specifiers).filter(self.VERSIONS)
+                # then
+                expected = [v for v in self.VERSIONS if v in specifiers]
+                self.assertListEqual(result, expected)
+
+    def test_should_filter_like_random_specifiers(self):
+        rng = random.Random(42)
+        versions = sorted({Version(_random_version(rng)) for _ in range(500)})
+        operators = ["<", "<=", ">", ">=", "==", "!=", "~="]
+        for _ in range(200):
+            parts = [
+                rng.choice(operators) + _random_version(rng, allow_local=False)
+                for _ in range(rng.randint(1, 3))
+            ]
+            try:
+                specifiers = SpecifierSet(",".join(parts))
+            except InvalidSpecifier:
+                continue
+            with self.subTest(specifiers=str(specifiers)):
+                # when
+                result = compile_specifiers(specifiers).filter(versions)
+                # then
+                expected = [v for v in versions if v in specifiers]
+                self.assertListEqual(result, expected)
+
+    def test_should_match_all_versions_with_empty_specifiers(self):
+        # when
+        result = compile_specifiers(SpecifierSet()).filter(self.VERSIONS)
+        # then
+        self.assertListEqual(result, self.VERSIONS)
+
+    def test_should_support_contains(self):
+        # given
+        compiled = compile_specifiers(SpecifierSet(">=1.0,<2"))
+        # when/then
+        self.assertIn(Version("1.5"), compiled)
+        self.assertNotIn(Version("2.0"), compiled)
+
+    def test_should_not_compile_unsupported_specifiers(self):
+        cases = ["===1.0", "==1.0+local"]
+        for case in cases:
+            with self.subTest(specifiers=case):
+                self.assertIsNone(compile_specifiers(SpecifierSet(case)))
+
+    def test_should_merge_specifiers_into_intervals(self):
+        # when
+        compiled = compile_specifiers(SpecifierSet(">=1.0,<2,!=1.5"))
+        # then
+        self.assertEqual(
+            compiled.intervals,
+            (
+                Interval(Version("1.0"), True, Version("1.5"), False),
+                Interval(Version("1.5"), False, Version("2"), False),
+            ),
+        )
+
+
+class TestInterval(NoSocketsTestCase):
+    def test_should_report_empty_intervals(self):
+        cases = [
+            (Interval(), False),
+            (Interval(Version("1.0"), True, Version("1.0"), True), False),
+            (Interval(Version("1.0"), True, Version("1.0"), False), True),
+            (Interval(Version("1.0"), False, Version("1.0"), True), True),
+            (Interval(Version("2.0"), True, Version("1.0"), True), True),
+        ]
+        for interval, expected in cases:
+            with self.subTest(interval=interval):
+                self.assertIs(interval.is_empty(), expected)
+
+
+class TestFilterIndexesInSpecifiers(NoSocketsTestCase):
+    def test_should_report_correctly(self):
+        versions = [Version(v) for v in ["0.9", "1.0.0", "1.1.0", "2.0.0"]]
+        cases = [
+            (SpecifierSet(">=1.0.0,<2"), 0, [1, 2]),
+            (SpecifierSet(">=1.0.0,<2"), 2, [2]),
+            (SpecifierSet(""), 1, [1, 2, 3]),
+            (SpecifierSet("===1.1.0"), 0, [2]),
+        ]
+        for specifiers, start, expected in cases:
+            with self.subTest(specifiers=specifiers, start=start):
+                result = filter_indexes_in_specifiers(versions, specifiers, start)
+                self.assertListEqual(result, expected)
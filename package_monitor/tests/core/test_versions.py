@@ -0,0 +1,144 @@
+from packaging.markers import InvalidMarker
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+from app_utils.testing import NoSocketsTestCase
+
+from package_monitor.core.versions import (
+    clear_cache,
+    is_marker_true,
+    is_python_supported,
+    parse_requirement,
+    parse_specifier_set,
+    parse_version,
+    to_version_or_none,
+)
+
+
+class TestParseVersion(NoSocketsTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def test_should_return_version(self):
+        # when
+        result = parse_version("1.0.0")
+        # then
+        self.assertEqual(result, Version("1.0.0"))
+
+    def test_should_return_same_object_for_same_string(self):
+        # when
+        result_1 = parse_version("1.0.0")
+        result_2 = parse_version("1.0.0")
+        # then
+        self.assertIs(result_1, result_2)
+        self.assertEqual(parse_version.cache_info().hits, 1)
+
+    def test_should_raise_error_for_invalid_version(self):
+        with self.assertRaises(InvalidVersion):
+            parse_version("invalid")
+
+
+class TestToVersionOrNone(NoSocketsTestCase):
+    def test_should_report_correctly(self):
+        cases = [
+            ("1.0.0", Version("1.0.0")),
+            ("invalid", None),
+            ("1.0.0alpha1", None),
+        ]
+        for s, expected in cases:
+            with self.subTest(case=s):
+                self.assertEqual(to_version_or_none(s), expected)
+
+
+class TestParseSpecifierSet(NoSocketsTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def test_should_return_same_object_for_same_string(self):
+        # when
+        result_1 = parse_specifier_set(">=3.8")
+        result_2 = parse_specifier_set(">=3.8")
+        # then
+        self.assertEqual(result_1, SpecifierSet(">=3.8"))
+        self.assertIs(result_1, result_2)
+
+    def test_should_raise_error_for_invalid_specifier(self):
+        with self.assertRaises(InvalidSpecifier):
+            parse_specifier_set("invalid")
+
+
+class TestIsPythonSupported(NoSocketsTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def test_should_report_correctly(self):
+        cases = [
+            (">=3.8", True),
+            (">=3.7,<4", True),
+            (">=3.11", False),
+            ("<3", False),
+        ]
+        for requires_python, expected in cases:
+            with self.subTest(requires_python=requires_python):
+                result = is_python_supported(requires_python, Version("3.10.1"))
+                self.assertIs(result, expected)
+
+    def test_should_cache_results(self):
+        # when
+        is_python_supported(">=3.8", Version("3.10.1"))
+        is_python_supported(">=3.8", Version("3.10.1"))
+        # then
+        self.assertEqual(is_python_supported.cache_info().hits, 1)
+
+    def test_should_raise_error_for_invalid_specifier(self):
+        with self.assertRaises(InvalidSpecifier):
+            is_python_supported("invalid", Version("3.10.1"))
+
+
+class TestParseRequirement(NoSocketsTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def test_should_return_requirement(self):
+        # when
+        result = parse_requirement('alpha>1; python_version>"3.0"')
+        # then
+        self.assertEqual(result, Requirement('alpha>1; python_version>"3.0"'))
+
+    def test_should_return_same_object_for_same_string(self):
+        # when
+        result_1 = parse_requirement("alpha>1")
+        result_2 = parse_requirement("alpha>1")
+        # then
+        self.assertIs(result_1, result_2)
+
+    def test_should_raise_error_for_invalid_requirement(self):
+        with self.assertRaises(InvalidRequirement):
+            parse_requirement("alpha>>1")
+
+
+class TestIsMarkerTrue(NoSocketsTestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def test_should_report_correctly(self):
+        cases = [
+            ('python_version>"3.0"', True),
+            ('python_version<"3.0"', False),
+            ('extra == "test"', False),
+        ]
+        for marker, expected in cases:
+            with self.subTest(marker=marker):
+                self.assertIs(is_marker_true(marker), expected)
+
+    def test_should_cache_results(self):
+        # when
+        is_marker_true('python_version>"3.0"')
+        is_marker_true('python_version>"3.0"')
+        # then
+        self.assertEqual(is_marker_true.cache_info().hits, 1)
+
+    def test_should_raise_error_for_invalid_marker(self):
+        with self.assertRaises(InvalidMarker):
+            is_marker_true("invalid")
@@ -0,0 +1,158 @@
+import asyncio
+from unittest import mock
+
+from django.test import TestCase
+
+from package_monitor.core.worker_loop import (
+    WorkerLoop,
+    new_event_loop,
+    run_in_new_loop,
+)
+
+MODULE_PATH = "package_monitor.core.worker_loop"
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+class TestWorkerLoop(TestCase):
+    def setUp(self) -> None:
+        self.worker_loop = WorkerLoop()
+
+    def tearDown(self) -> None:
+        self.worker_loop.close()
+
+    def test_should_return_result_of_coroutine(self):
+        # given
+        async def coro():
+            return 42
+
+        # when
+        result = self.worker_loop.run(coro())
+        # then
+        self.assertEqual(result, 42)
+
+    def test_should_raise_exception_of_coroutine(self):
+        # given
+        async def coro():
+            raise RuntimeError
+
+        # when/then
+        with self.assertRaises(RuntimeError):
+            self.worker_loop.run(coro())
+
+    def test_should_reuse_loop_between_runs(self):
+        # when
+        loop_1 = self.worker_loop.run(_current_loop())
+        loop_2 = self.worker_loop.run(_current_loop())
+        # then
+        self.assertIs(loop_1, loop_2)
+        self.assertTrue(self.worker_loop.is_running)
+
+    def test_should_reuse_session_between_runs(self):
+        # when
+        session_1 = self.worker_loop.run(self.worker_loop.session(10, 5))
+        session_2 = self.worker_loop.run(self.worker_loop.session(10, 5))
+        # then
+        self.assertIs(session_1, session_2)
+        self.assertFalse(session_1.closed)
+
+    def test_should_create_new_session_when_limits_change(self):
+        # when
+        session_1 = self.worker_loop.run(self.worker_loop.session(10, 5))
+        session_2 = self.worker_loop.run(self.worker_loop.session(20, 5))
+        # then
+        self.assertIsNot(session_1, session_2)
+        self.assertTrue(session_1.closed)
+        self.assertFalse(session_2.closed)
+
+    def test_should_close_session_and_stop_loop(self):
+        # given
+        loop = self.worker_loop.run(_current_loop())
+        session = self.worker_loop.run(self.worker_loop.session())
+        # when
+        self.worker_loop.close()
+        # then
+        self.assertTrue(session.closed)
+        self.assertTrue(loop.is_closed())
+        self.assertFalse(self.worker_loop.is_running)
+
+    def test_should_start_new_loop_after_close(self):
+        # given
+        loop_1 = self.worker_loop.run(_current_loop())
+        self.worker_loop.close()
+        # when
+        loop_2 = self.worker_loop.run(_current_loop())
+        # then
+        self.assertIsNot(loop_1, loop_2)
+
+    def test_should_start_new_loop_in_forked_process(self):
+        # given
+        loop_1 = self.worker_loop.run(_current_loop())
+        session_1 = self.worker_loop.run(self.worker_loop.session())
+        # when
+        with mock.patch(MODULE_PATH + ".os.getpid", return_value=-1):
+            loop_2 = self.worker_loop.run(_current_loop())
+            session_2 = self.worker_loop.run(self.worker_loop.session())
+        # then
+        self.assertIsNot(loop_1, loop_2)
+        self.assertIsNot(session_1, session_2)
+        # cleanup
+        with mock.patch(MODULE_PATH + ".os.getpid", return_value=-1):
+            self.worker_loop.close()
+        asyncio.run_coroutine_threadsafe(session_1.close(), loop_1).result()
+        loop_1.call_soon_threadsafe(loop_1.stop)
+
+
+class TestNewEventLoop(TestCase):
+    def test_should_return_default_loop(self):
+        # when
+        loop = new_event_loop()
+        # then
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        loop.close()
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_UVLOOP_ENABLED", True)
+    @mock.patch(MODULE_PATH + ".uvloop")
+    def test_should_return_uvloop_loop_when_enabled(self, mock_uvloop):
+        # when
+        loop = new_event_loop()
+        # then
+        self.assertIs(loop, mock_uvloop.new_event_loop.return_value)
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_UVLOOP_ENABLED", False)
+    @mock.patch(MODULE_PATH + ".uvloop")
+    def test_should_not_use_uvloop_when_disabled(self, mock_uvloop):
+        # when
+        loop = new_event_loop()
+        # then
+        self.assertFalse(mock_uvloop.new_event_loop.called)
+        loop.close()
+
+    @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_UVLOOP_ENABLED", True)
+    @mock.patch(MODULE_PATH + ".uvloop", None)
+    def test_should_return_default_loop_when_uvloop_not_installed(self):
+        # when
+        loop = new_event_loop()
+        # then
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        loop.close()
+
+
+class TestRunInNewLoop(TestCase):
+    def test_should_return_result_and_close_loop(self):
+        # when
+        loop = run_in_new_loop(_current_loop())
+        # then
+        self.assertTrue(loop.is_closed())
+
+    def test_should_cancel_remaining_tasks(self):
+        # given
+        async def coro():
+            return asyncio.create_task(asyncio.sleep(60))
+
+        # when
+        task = run_in_new_loop(coro())
+        # then
+        self.assertTrue(task.cancelled())
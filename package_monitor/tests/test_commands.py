@@ -16,3 +16,19 @@ class TestPurgeAll(NoSocketsTestCase):
         out = StringIO()
         call_command("package_monitor_refresh", stdout=out)
         self.assertTrue(mock_update_all.called)
+
+    def test_should_pass_concurrency_limits(self, mock_update_all):
+        mock_update_all.return_value = 0
+
+        out = StringIO()
+        call_command(
+            "package_monitor_refresh",
+            "--max-concurrency",
+            "5",
+            "--max-concurrency-per-host",
+            "2",
+            stdout=out,
+        )
+        mock_update_all.assert_called_once_with(
+            max_concurrency=5, max_concurrency_per_host=2
+        )
@@ -53,6 +53,7 @@ class TestUpdatePackagesFromPyPi(TestCase):
         requests_mocker.get(
             "https://pypi.org/pypi/alpha/1.1.0/json", payload=pypi_alpha.asdict()
         )
+        requests_mocker.get("https://pypi.eveuniversity.org/alpha/json", status=404)
 
         # when
         tasks.update_distributions()
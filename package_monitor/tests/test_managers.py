@@ -5,7 +5,7 @@ from packaging.specifiers import SpecifierSet
 
 from app_utils.testing import NoSocketsTestCase
 
-from package_monitor.models import Distribution
+from package_monitor.models import Distribution, ReleaseMetadata
 
 from .factories import DistributionFactory, DistributionPackageFactory, make_packages
 
@@ -159,6 +159,32 @@ class TestDistributionsUpdateAll(NoSocketsTestCase):
         self.assertEqual(obj.latest_version, "")
         self.assertIsNone(obj.is_outdated)
 
+    def test_should_load_and_store_releases_outside_of_refresh(
+        self,
+        mock_gather_distribution_packages,
+        mock_compile_package_requirements,
+        mock_update_packages_from_pypi,
+    ):
+        # given
+        ReleaseMetadata.objects.create(name="alpha", version="1.0.0")
+        dist_alpha = DistributionPackageFactory(name="alpha", current="1.0.0")
+        mock_gather_distribution_packages.return_value = make_packages(dist_alpha)
+        mock_compile_package_requirements.return_value = {}
+
+        def update_packages_from_pypi(*args, releases, **kwargs):
+            self.assertSetEqual(set(releases.known["alpha"]), {"1.0.0"})
+            releases.add("alpha", {"1.1.0": {"info": {"version": "1.1.0"}}})
+
+        mock_update_packages_from_pypi.side_effect = update_packages_from_pypi
+        # when
+        Distribution.objects.update_all()
+        # then
+        self.assertEqual(mock_update_packages_from_pypi.call_count, 1)
+        self.assertSetEqual(
+            set(ReleaseMetadata.objects.values_list("version", flat=True)),
+            {"1.0.0", "1.1.0"},
+        )
+
 
 class TestDistributionFilterVisible(NoSocketsTestCase):
     @mock.patch(MODULE_PATH + ".PACKAGE_MONITOR_SHOW_ALL_PACKAGES", True)
@@ -302,3 +328,79 @@ class TestDistributionNotifyUpdates(NoSocketsTestCase):
                         self.assertEqual(
                             tc.latest_notified_version, dist.latest_notified_version
                         )
+
+
+class TestReleaseMetadataManager(NoSocketsTestCase):
+    def test_should_return_stored_releases_data(self):
+        # given
+        ReleaseMetadata.objects.create(
+            name="alpha", version="1.0.0", requires_dist=["bravo>=1"]
+        )
+        ReleaseMetadata.objects.create(name="alpha", version="1.1.0")
+        ReleaseMetadata.objects.create(name="bravo", version="1.0.0")
+        # when
+        result = ReleaseMetadata.objects.releases_data("Alpha", ["1.0.0", "2.0.0"])
+        # then
+        self.assertSetEqual(set(result.keys()), {"1.0.0"})
+        self.assertListEqual(result["1.0.0"]["info"]["requires_dist"], ["bravo>=1"])
+
+    def test_should_store_new_releases_data(self):
+        # given
+        ReleaseMetadata.objects.create(name="alpha", version="1.0.0")
+        releases = {
+            "1.0.0": {"info": {"version": "1.0.0", "requires_dist": ["bravo"]}},
+            "1.1.0": {
+                "info": {
+                    "version": "1.1.0",
+                    "requires_dist": None,
+                    "requires_python": ">=3.8",
+                    "yanked": True,
+                }
+            },
+        }
+        # when
+        ReleaseMetadata.objects.store_releases_data("Alpha", releases)
+        # then
+        self.assertEqual(ReleaseMetadata.objects.count(), 2)
+        obj = ReleaseMetadata.objects.get(name="alpha", version="1.0.0")
+        self.assertListEqual(obj.requires_dist, [])
+        obj = ReleaseMetadata.objects.get(name="alpha", version="1.1.0")
+        self.assertListEqual(obj.requires_dist, [])
+        self.assertEqual(obj.requires_python, ">=3.8")
+        self.assertTrue(obj.is_yanked)
+
+    def test_should_ignore_releases_with_too_long_versions(self):
+        # given
+        version = "1." + "0" * 100
+        releases = {version: {"info": {"version": version}}}
+        # when
+        ReleaseMetadata.objects.store_releases_data("alpha", releases)
+        # then
+        self.assertFalse(ReleaseMetadata.objects.exists())
+
+    def test_should_return_stored_releases_data_of_packages(self):
+        # given
+        ReleaseMetadata.objects.create(name="alpha", version="1.0.0")
+        ReleaseMetadata.objects.create(name="alpha", version="1.1.0")
+        ReleaseMetadata.objects.create(name="bravo", version="1.0.0")
+        ReleaseMetadata.objects.create(name="charlie", version="1.0.0")
+        # when
+        result = ReleaseMetadata.objects.packages_releases_data(["Alpha", "bravo"])
+        # then
+        self.assertSetEqual(set(result.keys()), {"alpha", "bravo"})
+        self.assertSetEqual(set(result["alpha"].keys()), {"1.0.0", "1.1.0"})
+        self.assertEqual(result["bravo"]["1.0.0"]["info"]["version"], "1.0.0")
+
+    def test_should_store_new_releases_data_of_packages(self):
+        # given
+        releases = {
+            "Alpha": {"1.0.0": {"info": {"version": "1.0.0"}}},
+            "bravo": {"2.0.0": {"info": {"version": "2.0.0"}}},
+        }
+        # when
+        ReleaseMetadata.objects.store_packages_releases_data(releases)
+        # then
+        self.assertSetEqual(
+            set(ReleaseMetadata.objects.values_list("name", "version")),
+            {("alpha", "1.0.0"), ("bravo", "2.0.0")},
+        )
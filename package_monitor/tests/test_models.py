@@ -1,5 +1,7 @@
 from app_utils.testing import NoSocketsTestCase
 
+from package_monitor.models import ReleaseMetadata
+
 from .factories import DistributionFactory
 
 
@@ -31,3 +33,34 @@ class TestDistribution(NoSocketsTestCase):
         obj = DistributionFactory(apps=["dummy"])
         # then
         self.assertTrue(obj.has_installed_apps)
+
+
+class TestReleaseMetadata(NoSocketsTestCase):
+    def test_should_have_str(self):
+        # given
+        obj = ReleaseMetadata(name="alpha", version="1.2.3")
+        # when/then
+        self.assertEqual(str(obj), "alpha 1.2.3")
+
+    def test_should_return_release_data(self):
+        # given
+        obj = ReleaseMetadata(
+            name="alpha",
+            version="1.2.3",
+            requires_dist=["bravo>=1.0"],
+            requires_python=">=3.8",
+            is_yanked=True,
+        )
+        # when
+        result = obj.to_release_data()
+        # then
+        expected = {
+            "info": {
+                "name": "alpha",
+                "version": "1.2.3",
+                "requires_dist": ["bravo>=1.0"],
+                "requires_python": ">=3.8",
+                "yanked": True,
+            }
+        }
+        self.assertDictEqual(result, expected)